@@ -6,4 +6,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.local")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported after django is set up, it loads the graphql schema
+from config.schema import validation_rules  # noqa: E402
+from core.websocket import GraphQLWebSocket  # noqa: E402
+
+websocket_application = GraphQLWebSocket(validation_rules=validation_rules)
+
+
+async def application(scope, receive, send):
+    """serve graphql subscriptions over websockets and everything else with django"""
+    if scope["type"] == "websocket":
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
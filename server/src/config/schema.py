@@ -1,10 +1,21 @@
 import graphene
+from graphene.validation import depth_limit_validator
+
+from core.complexity import QueryCostRule, cost_settings
 
 from projects.schema import Query as ProjectQuery
 from tasks.schema import Query as TaskQuery
 
 from projects.mutations import CreateProject, UpdateProject
-from tasks.mutations import CreateTask, UpdateTask, AddTaskComment
+from tasks.mutations import (
+    CreateTask,
+    UpdateTask,
+    AddTaskComment,
+    BulkCreateTasks,
+    BulkUpdateTaskStatus,
+    BulkAddComments,
+)
+from tasks.subscriptions import Subscription as TaskSubscription
 
 
 class Query(ProjectQuery, TaskQuery, graphene.ObjectType):
@@ -21,5 +32,20 @@ class Mutation(graphene.ObjectType):
     update_task = UpdateTask.Field()
     add_task_comment = AddTaskComment.Field()
 
+    bulk_create_tasks = BulkCreateTasks.Field()
+    bulk_update_task_status = BulkUpdateTaskStatus.Field()
+    bulk_add_comments = BulkAddComments.Field()
+
+
+class Subscription(TaskSubscription, graphene.ObjectType):
+    """root graphql subscription combining all app subscriptions"""
+    pass
+
+
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+# checked when documents are validated, before anything executes
+validation_rules = (
+    depth_limit_validator(max_depth=cost_settings()["MAX_DEPTH"]),
+    QueryCostRule,
+)
@@ -21,6 +21,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "graphene_django",
     "corsheaders",
+    "core",
     "orgs",
     "projects",
     "tasks",
@@ -34,6 +35,7 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "core.middleware.ProfilingMiddleware",
     "core.middleware.OrganizationMiddleware",
 ]
 
@@ -79,4 +81,84 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 GRAPHENE = {
     "SCHEMA": "config.schema.schema",
+    # the last middleware is the outermost, so profiling times the whole field
+    "MIDDLEWARE": [
+        "core.responses.ResponseCacheTagMiddleware",
+        "core.optimizer.QueryOptimizerMiddleware",
+        "core.profiling.ResolverProfilingMiddleware",
+    ],
+}
+
+ORGANIZATION_CACHE = {
+    "MAX_SIZE": int(os.getenv("ORG_CACHE_MAX_SIZE", "1024")),
+    "TTL": int(os.getenv("ORG_CACHE_TTL", "300")),
+    "NEGATIVE_TTL": int(os.getenv("ORG_CACHE_NEGATIVE_TTL", "30")),
+    # django cache alias shared across processes, e.g. "default"
+    "BACKEND": os.getenv("ORG_CACHE_BACKEND") or None,
+}
+
+# largest page a connection field returns
+GRAPHQL_MAX_PAGE_SIZE = int(os.getenv("GRAPHQL_MAX_PAGE_SIZE", "100"))
+
+# largest list a bulk mutation accepts
+GRAPHQL_MAX_BULK_ITEMS = int(os.getenv("GRAPHQL_MAX_BULK_ITEMS", "1000"))
+
+PERSISTED_QUERIES = {
+    # django cache alias holding hash -> query text
+    "BACKEND": "default",
+    "TIMEOUT": None,
+    "DOCUMENT_CACHE_SIZE": int(os.getenv("GRAPHQL_DOCUMENT_CACHE_SIZE", "512")),
+    # max-age for hash-only GET responses, 0 disables Cache-Control
+    "GET_MAX_AGE": int(os.getenv("PERSISTED_QUERY_GET_MAX_AGE", "0")),
+}
+
+# graphql documents sent by the react client, used by benchmarks
+CLIENT_DOCUMENTS_DIR = Path(
+    os.getenv("CLIENT_DOCUMENTS_DIR", BASE_DIR.parent.parent / "client" / "src" / "graphql")
+)
+
+GRAPHQL_COST = {
+    # documents over budget are rejected during validation
+    "MAX_COST": int(os.getenv("GRAPHQL_MAX_COST", "10000")),
+    "MAX_DEPTH": int(os.getenv("GRAPHQL_MAX_DEPTH", "8")),
+    # rows assumed for list fields without first/last
+    "DEFAULT_LIST_SIZE": 20,
+    "LIST_SIZES": {
+        "Query.projects": 50,
+        "Query.tasks": 100,
+        "Query.taskComments": 50,
+        "Query.projectStatsBatch": 50,
+        "ProjectType.tasks": 25,
+        "TaskType.comments": 5,
+    },
+    # cost per object a field returns, 1 for object fields and 0 for scalars otherwise
+    "WEIGHTS": {
+        "ProjectStatsType.overdueTasks": 1,
+    },
+}
+
+PROFILING = {
+    # off by default: records sql and resolver timings for every request
+    "ENABLED": os.getenv("GRAPHQL_PROFILING", "false").lower() == "true",
+    # requests with this header get apollo tracing and sql stats in extensions
+    "HEADER": "X-GRAPHQL-PROFILE",
+    # histogram series kept per metric before new labels fold into "other"
+    "MAX_SERIES": 200,
+}
+
+RESPONSE_CACHE = {
+    # serialized bytes of query results kept per tenant, 0 disables the cache
+    "MAX_BYTES_PER_TENANT": int(os.getenv("RESPONSE_CACHE_MAX_BYTES_PER_TENANT", str(1024 * 1024))),
+    "MAX_TENANTS": int(os.getenv("RESPONSE_CACHE_MAX_TENANTS", "1000")),
+    "TTL": int(os.getenv("RESPONSE_CACHE_TTL", "300")),
+    # django cache alias holding tag versions, shared so writes invalidate every process
+    "TAG_BACKEND": os.getenv("RESPONSE_CACHE_TAG_BACKEND", "default"),
+}
+
+SUBSCRIPTIONS = {
+    # websocket path of the graphql-transport-ws endpoint
+    "PATH": "/graphql/",
+    # core.pubsub.Broker implementation that fans events out to subscribers
+    "BROKER": os.getenv("SUBSCRIPTION_BROKER", "core.pubsub.LocalBroker"),
+    "BROKER_OPTIONS": {},
 }
@@ -1,10 +1,17 @@
 from django.urls import path
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
 
+from config.schema import validation_rules
+from core.views import AsyncGraphQLView, GraphQLView, metrics_view
+
 urlpatterns = [
     path(
         "graphql/",
-        csrf_exempt(GraphQLView.as_view(graphiql=True)),
+        csrf_exempt(GraphQLView.as_view(graphiql=True, validation_rules=validation_rules)),
+    ),
+    path(
+        "graphql/async/",
+        csrf_exempt(AsyncGraphQLView.as_view(graphiql=True, validation_rules=validation_rules)),
     ),
+    path("metrics/", metrics_view),
 ]
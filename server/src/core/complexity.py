@@ -0,0 +1,136 @@
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLList,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationType,
+    ValidationRule,
+    get_named_type,
+    get_nullable_type,
+)
+
+
+def cost_settings():
+    """the GRAPHQL_COST setting with defaults filled in"""
+    options = getattr(settings, "GRAPHQL_COST", {})
+    return {
+        "MAX_COST": options.get("MAX_COST", 10000),
+        "MAX_DEPTH": options.get("MAX_DEPTH", 8),
+        "DEFAULT_LIST_SIZE": options.get("DEFAULT_LIST_SIZE", 20),
+        "LIST_SIZES": options.get("LIST_SIZES", {}),
+        "WEIGHTS": options.get("WEIGHTS", {}),
+    }
+
+
+class CostEstimator:
+    """static cost of an operation from field weights and estimated list sizes
+
+    every object returned costs its field's weight (1 unless configured)
+    plus its selection, and scalars cost nothing unless weighted. a list
+    returns as many objects as the page size it was asked for, or else
+    the estimated rows configured for "Type.field".
+    """
+    def __init__(self, schema, fragments, options=None):
+        self.schema = schema
+        self.fragments = fragments
+        self.options = options or cost_settings()
+
+    def operation_cost(self, operation):
+        """cost of one operation definition"""
+        root = {
+            OperationType.QUERY: self.schema.query_type,
+            OperationType.MUTATION: self.schema.mutation_type,
+            OperationType.SUBSCRIPTION: self.schema.subscription_type,
+        }[operation.operation]
+        if root is None:
+            return 0
+        return self.selection_cost(root, operation.selection_set, set())
+
+    def selection_cost(self, parent_type, selection_set, visited, edges_size=None):
+        if selection_set is None or not hasattr(parent_type, "fields"):
+            return 0
+
+        total = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                total += self.field_cost(parent_type, selection, visited, edges_size)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = (
+                    self.schema.get_type(selection.type_condition.name.value)
+                    if selection.type_condition else parent_type
+                )
+                total += self.selection_cost(fragment_type, selection.selection_set, visited, edges_size)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                # cycles are reported by the spec rules, count each spread once per path
+                if fragment is None or name in visited:
+                    continue
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                total += self.selection_cost(
+                    fragment_type, fragment.selection_set, visited | {name}, edges_size
+                )
+        return total
+
+    def field_cost(self, parent_type, node, visited, edges_size):
+        name = node.name.value
+        field = parent_type.fields.get(name)
+        if field is None or name.startswith("__"):
+            return 0
+
+        key = f"{parent_type.name}.{name}"
+        named_type = get_named_type(field.type)
+        is_list = isinstance(get_nullable_type(field.type), GraphQLList)
+        if not hasattr(named_type, "fields") and key not in self.options["WEIGHTS"]:
+            return 0
+        weight = self.options["WEIGHTS"].get(key, 1)
+
+        page_size = self.page_size(node)
+        if is_list:
+            rows = edges_size if name == "edges" and edges_size else page_size
+            if rows is None:
+                rows = self.options["LIST_SIZES"].get(key, self.options["DEFAULT_LIST_SIZE"])
+            return rows * (weight + self.selection_cost(named_type, node.selection_set, visited))
+
+        # connections pass their page size down to their edges
+        return weight + self.selection_cost(named_type, node.selection_set, visited, page_size)
+
+    @staticmethod
+    def page_size(node):
+        """requested first/last, capped at the maximum page size"""
+        max_size = getattr(settings, "GRAPHQL_MAX_PAGE_SIZE", 100)
+        for argument in node.arguments or ():
+            if argument.name.value in ("first", "last"):
+                if isinstance(argument.value, IntValueNode):
+                    return min(int(argument.value.value), max_size)
+                # a variable could ask for the largest page
+                return max_size
+        return None
+
+
+def operation_cost(schema, document, operation, options=None):
+    """cost of operation within document"""
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    return CostEstimator(schema, fragments, options).operation_cost(operation)
+
+
+class QueryCostRule(ValidationRule):
+    """reject operations whose static cost exceeds GRAPHQL_COST["MAX_COST"]"""
+
+    def enter_operation_definition(self, node, *_args):
+        options = cost_settings()
+        cost = operation_cost(self.context.schema, self.context.document, node, options)
+        if cost > options["MAX_COST"]:
+            self.report_error(GraphQLError(
+                f"Query cost {cost} exceeds the maximum cost of {options['MAX_COST']}",
+                node,
+                extensions={"code": "QUERY_TOO_COSTLY", "cost": cost, "maximumCost": options["MAX_COST"]},
+            ))
@@ -0,0 +1,162 @@
+import asyncio
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+
+from core.execution import is_async
+
+
+class DataLoader:
+    """batches key lookups into a single call to batch_load_fn"""
+    def __init__(self, batch_load_fn, default=None, abatch_load_fn=None):
+        self.batch_load_fn = batch_load_fn
+        self.abatch_load_fn = abatch_load_fn or sync_to_async(batch_load_fn)
+        self.default = default
+        self._cache = {}
+        self._queue = {}
+        self._batch = None
+
+    def prime(self, keys):
+        """queue keys so the next dispatch loads them together"""
+        for key in keys:
+            if key not in self._cache:
+                self._queue[key] = None
+
+    def load(self, key):
+        """return the value for key, dispatching queued keys if needed"""
+        if key not in self._cache:
+            self.prime([key])
+            self.dispatch()
+        return self._cache[key]
+
+    def load_many(self, keys):
+        """return values for several keys with at most one dispatch"""
+        keys = list(keys)
+        self.prime(keys)
+        if self._queue:
+            self.dispatch()
+        return [self._cache[key] for key in keys]
+
+    def dispatch(self):
+        """load every queued key in one batch"""
+        keys, self._queue = list(self._queue), {}
+        self._store(keys, self.batch_load_fn(keys))
+
+    def load_for(self, info, key):
+        """load key synchronously, or as an awaitable on the async view"""
+        if is_async(info):
+            return self.aload(key)
+        return self.load(key)
+
+    async def aload(self, key):
+        """async load; keys requested in the same loop turn share one batch"""
+        if key not in self._cache:
+            self.prime([key])
+            if self._batch is None:
+                self._batch = asyncio.ensure_future(self._adispatch())
+            await self._batch
+        return self._cache[key]
+
+    async def _adispatch(self):
+        # let sibling resolvers queue their keys before the batch runs
+        await asyncio.sleep(0)
+        self._batch = None
+        keys, self._queue = list(self._queue), {}
+        self._store(keys, await self.abatch_load_fn(keys))
+
+    def _store(self, keys, results):
+        for key in keys:
+            value = results.get(key)
+            if value is None and callable(self.default):
+                value = self.default()
+            self._cache[key] = value
+
+
+class RelatedLoader(DataLoader):
+    """loads the reverse foreign key side of a relation for many parents"""
+    def __init__(self, registry, model, field_name):
+        relation = model._meta.get_field(field_name)
+        self.registry = registry
+        self.related_model = relation.related_model
+        self.fk_attname = relation.field.attname
+        super().__init__(self.batch_load, default=list, abatch_load_fn=self.abatch_load)
+
+    def get_queryset(self):
+        """related rows in the related model's default ordering"""
+        manager = self.related_model._default_manager
+        return manager.order_by(*self.related_model._meta.ordering)
+
+    def batch_load(self, keys):
+        """one IN (...) query for all parent keys"""
+        queryset = self.get_queryset().filter(**{f"{self.fk_attname}__in": keys})
+        return self.group(list(queryset))
+
+    async def abatch_load(self, keys):
+        """batch_load using async iteration"""
+        queryset = self.get_queryset().filter(**{f"{self.fk_attname}__in": keys})
+        return self.group([obj async for obj in queryset])
+
+    def group(self, children):
+        """group children by parent key and register them for their own relations"""
+        grouped = defaultdict(list)
+        for obj in children:
+            grouped[getattr(obj, self.fk_attname)].append(obj)
+        self.registry.register(children)
+        return grouped
+
+
+class Loaders:
+    """per-request registry of loaders attached to the graphql context"""
+    def __init__(self):
+        self._loaders = {}
+        self._related = {}
+        self._seen = defaultdict(dict)
+
+    def loader(self, name, batch_load_fn, default=None):
+        """named loader around batch_load_fn, created once per request"""
+        if name not in self._loaders:
+            self._loaders[name] = DataLoader(batch_load_fn, default=default)
+        return self._loaders[name]
+
+    def register(self, objects):
+        """record resolved objects so child relations load in one batch"""
+        objects = list(objects)
+        if not objects:
+            return objects
+
+        model = type(objects[0])
+        for obj in objects:
+            self._seen[model][obj.pk] = None
+
+        for (parent, _), loader in self._related.items():
+            if parent is model:
+                loader.prime(obj.pk for obj in objects)
+        return objects
+
+    def related(self, model, field_name):
+        """loader for a reverse relation, primed with every known parent"""
+        key = (model, field_name)
+        if key not in self._related:
+            loader = RelatedLoader(self, model, field_name)
+            loader.prime(self._seen[model])
+            self._related[key] = loader
+        return self._related[key]
+
+
+def get_loaders(info):
+    """return the loaders for the current request, creating them once"""
+    context = info.context
+    loaders = getattr(context, "loaders", None)
+    if loaders is None:
+        loaders = Loaders()
+        context.loaders = loaders
+    return loaders
+
+
+def load_related(info, instance, field_name):
+    """return a reverse relation, preferring rows already prefetched"""
+    prefetched = getattr(instance, "_prefetched_objects_cache", {})
+    if field_name in prefetched:
+        return list(prefetched[field_name])
+    loader = get_loaders(info).related(type(instance), field_name)
+    return loader.load_for(info, instance.pk)
@@ -0,0 +1,137 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import GraphQLError, OperationDefinitionNode, parse, print_ast, validate
+
+
+def document_hash(query):
+    """sha256 hex digest identifying a query document"""
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class CachedDocument:
+    """a parsed document together with its validation errors"""
+    def __init__(self, query, document, errors):
+        self.query = query
+        self.document = document
+        self.errors = errors
+        self._normalized_hash = None
+        self.costs = {}
+
+    @property
+    def normalized_hash(self):
+        """hash of the printed document, ignoring formatting and comments"""
+        if self._normalized_hash is None:
+            self._normalized_hash = document_hash(print_ast(self.document))
+        return self._normalized_hash
+
+
+class DocumentCache:
+    """bounded lru of parsed and validated documents keyed by sha256"""
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """cached document for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        """store entry, evicting the least recently used"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def load(self, key, query, schema, rules=None, max_errors=None):
+        """parse and validate query once, then serve it from the cache
+
+        raises GraphQLError if the query does not parse.
+        """
+        entry = self.get(key)
+        if entry is None or entry.query != query:
+            document = parse(query)
+            errors = validate(schema, document, rules, max_errors)
+            entry = CachedDocument(query, document, errors)
+            self.put(key, entry)
+        return entry
+
+    def clear(self):
+        """drop every document and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class PersistedQueryRegistry:
+    """automatic persisted queries: sha256 hash -> query text"""
+    key_prefix = "apq:"
+
+    def __init__(self, backend="default", timeout=None):
+        self.backend = backend
+        self.timeout = timeout
+
+    @classmethod
+    def from_settings(cls):
+        """build the registry from the PERSISTED_QUERIES setting"""
+        options = getattr(settings, "PERSISTED_QUERIES", {})
+        return cls(backend=options.get("BACKEND", "default"), timeout=options.get("TIMEOUT"))
+
+    def lookup(self, sha256_hash):
+        """query text registered for sha256_hash, or None"""
+        return caches[self.backend].get(self.key_prefix + sha256_hash)
+
+    def register(self, sha256_hash, query):
+        """store query under its hash after checking they match"""
+        if document_hash(query) != sha256_hash:
+            raise GraphQLError(
+                "provided sha does not match query",
+                extensions={"code": "PERSISTED_QUERY_HASH_MISMATCH"},
+            )
+        caches[self.backend].set(self.key_prefix + sha256_hash, query, self.timeout)
+
+
+def persisted_query_not_found():
+    """the error apollo clients answer by resending the full query"""
+    return GraphQLError(
+        "PersistedQueryNotFound",
+        extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+    )
+
+
+document_cache = DocumentCache(
+    max_size=getattr(settings, "PERSISTED_QUERIES", {}).get("DOCUMENT_CACHE_SIZE", 512),
+)
+persisted_queries = PersistedQueryRegistry.from_settings()
+
+
+GQL_TEMPLATE = re.compile(r"gql`(.*?)`", re.DOTALL)
+
+
+def client_documents(directory=None):
+    """operation name -> query text for every gql`` template in the client"""
+    directory = Path(directory or settings.CLIENT_DOCUMENTS_DIR)
+    documents = {}
+    for path in sorted(directory.glob("*.ts")):
+        for query in GQL_TEMPLATE.findall(path.read_text()):
+            for definition in parse(query).definitions:
+                if isinstance(definition, OperationDefinitionNode) and definition.name:
+                    documents[definition.name.value] = query
+    return documents
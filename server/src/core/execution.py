@@ -0,0 +1,38 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
+
+def is_async(info):
+    """whether the request is being executed by the async view"""
+    return getattr(info.context, "is_async", False)
+
+
+def with_async(async_resolver):
+    """run async_resolver instead of the decorated one on the async view
+
+    async_resolver takes the same (root, info, **kwargs) arguments and is
+    expected to use django's async orm api.
+    """
+    def decorator(resolver):
+        @wraps(resolver)
+        def wrapper(root, info, **kwargs):
+            if is_async(info):
+                return async_resolver(root, info, **kwargs)
+            return resolver(root, info, **kwargs)
+        return wrapper
+    return decorator
+
+
+def in_thread(resolver):
+    """run resolver through sync_to_async on the async view
+
+    for resolvers whose work has to share one transaction, which the
+    async orm api cannot do.
+    """
+    @wraps(resolver)
+    def wrapper(root, info, **kwargs):
+        if is_async(info):
+            return sync_to_async(resolver)(root, info, **kwargs)
+        return resolver(root, info, **kwargs)
+    return wrapper
@@ -0,0 +1,47 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from graphene_django.settings import graphene_settings
+from graphql import parse, validate
+
+from core.documents import DocumentCache, client_documents, document_hash
+
+
+def per_call_us(fn, iterations):
+    """average wall time of fn in microseconds"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+class Command(BaseCommand):
+    help = "measure parse/validate cost saved by the document cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000)
+        parser.add_argument("--documents", help="directory with the client's gql documents")
+        parser.add_argument("--output", help="write results as json to this file")
+
+    def handle(self, *args, **options):
+        schema = graphene_settings.SCHEMA.graphql_schema
+        iterations = options["iterations"]
+        cache = DocumentCache()
+
+        results = {}
+        for name, query in client_documents(options["documents"]).items():
+            key = document_hash(query)
+            cache.load(key, query, schema)
+
+            uncached = per_call_us(lambda: validate(schema, parse(query)), iterations)
+            cached = per_call_us(lambda: cache.load(document_hash(query), query, schema), iterations)
+            results[name] = {"uncached_us": round(uncached, 2), "cached_us": round(cached, 2)}
+            self.stdout.write(
+                f"{name}: parse+validate {uncached:.1f}us, cached {cached:.1f}us "
+                f"({uncached / cached:.0f}x)"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
@@ -0,0 +1,203 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from graphql import OperationDefinitionNode, OperationType, parse
+
+from core.documents import client_documents
+from core.responses import response_cache
+from orgs.models import Organization
+from projects.models import Project
+from tasks.models import Task, TaskComment
+
+
+def percentile(values, pct):
+    """nearest-rank percentile of values"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def operation_of(query):
+    """the single operation definition of a client document"""
+    return next(d for d in parse(query).definitions if isinstance(d, OperationDefinitionNode))
+
+
+class Command(BaseCommand):
+    help = "replay the client's graphql documents and record latency, queries and memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", required=True, help="organization slug to replay against")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--documents", help="directory with the client's gql documents")
+        parser.add_argument("--operation", action="append", help="only replay these operations")
+        parser.add_argument(
+            "--response-cache",
+            action="store_true",
+            help="let repeated queries hit the response cache instead of executing",
+        )
+        parser.add_argument("--output", default="bench_graphql.json")
+        parser.add_argument("--baseline", help="earlier output to compare against")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2, help="relative p50 slowdown reported as a regression"
+        )
+
+    def handle(self, *args, **options):
+        org = Organization.objects.get(slug=options["org"])
+        documents = client_documents(options["documents"])
+        if options["operation"]:
+            documents = {name: documents[name] for name in options["operation"]}
+
+        values = self.values(org)
+        self.client = Client()
+        self.headers = {"X-ORG-SLUG": org.slug}
+        self.use_cache = options["response_cache"]
+
+        results = {}
+        # the in-process client sends requests for the "testserver" host
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for name, query in documents.items():
+                operation = operation_of(query)
+                variables = self.variables(operation, values)
+                results[name] = self.measure(operation, query, variables, options)
+                self.stdout.write(
+                    f"{name}: p50 {results[name]['latency_ms']['p50']}ms "
+                    f"p99 {results[name]['latency_ms']['p99']}ms, "
+                    f"{results[name]['queries']['max']} queries, "
+                    f"{results[name]['memory_kb']['peak']}KB peak"
+                )
+
+        report = {
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "dataset": {
+                "organization": org.slug,
+                "projects": Project.objects.filter(organization=org).count(),
+                "tasks": Task.objects.filter(project__organization=org).count(),
+                "comments": TaskComment.objects.filter(task__project__organization=org).count(),
+            },
+            "iterations": options["iterations"],
+            "response_cache": self.use_cache,
+            "operations": results,
+        }
+        with open(options["output"], "w") as fh:
+            json.dump(report, fh, indent=2)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                self.compare(json.load(fh)["operations"], results, options["threshold"])
+
+    def values(self, org):
+        """variable values picked from the tenant's data"""
+        project = Project.objects.filter(organization=org).order_by("-task_count").first()
+        task = Task.objects.filter(project=project).order_by("-id").first() if project else None
+        return {
+            "projectId": project.id if project else 0,
+            "taskId": task.id if task else 0,
+            "name": "Benchmark project",
+            "title": "Benchmark task",
+            "description": "benchmark",
+            "content": "benchmark comment",
+            "authorEmail": "bench@example.com",
+            "assigneeEmail": "bench@example.com",
+        }
+
+    def variables(self, operation, values):
+        """variables for operation, with statuses valid for its model"""
+        status = "TODO" if "task" in operation.name.value.lower() else "ACTIVE"
+        variables = {}
+        for definition in operation.variable_definitions:
+            name = definition.variable.name.value
+            if name == "status":
+                variables[name] = status
+            elif name in values:
+                variables[name] = values[name]
+            elif definition.type.kind == "non_null_type":
+                raise Exception(f"No benchmark value for ${name} in {operation.name.value}")
+        return variables
+
+    def request(self, operation, query, variables):
+        """one request; mutations are rolled back so every run sees the same data"""
+        if not self.use_cache:
+            response_cache.clear()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = self.client.post(
+                    "/graphql/",
+                    {"query": query, "variables": variables},
+                    content_type="application/json",
+                    headers=self.headers,
+                )
+                elapsed = time.perf_counter() - start
+            if operation.operation == OperationType.MUTATION:
+                transaction.set_rollback(True)
+
+        payload = response.json()
+        if payload.get("errors"):
+            raise Exception(f"{operation.name.value} failed: {payload['errors']}")
+        return elapsed, len(ctx.captured_queries)
+
+    def measure(self, operation, query, variables, options):
+        """latency percentiles, query counts and allocations for one operation"""
+        for _ in range(options["warmup"]):
+            self.request(operation, query, variables)
+
+        latencies, queries = [], []
+        for _ in range(options["iterations"]):
+            elapsed, count = self.request(operation, query, variables)
+            latencies.append(elapsed * 1000)
+            queries.append(count)
+
+        # allocations are traced in a separate run so tracing does not skew latency
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            self.request(operation, query, variables)
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 3),
+                "p90": round(percentile(latencies, 90), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "mean": round(statistics.fmean(latencies), 3),
+                "max": round(max(latencies), 3),
+            },
+            "queries": {"min": min(queries), "max": max(queries)},
+            "memory_kb": {
+                "peak": round((peak - before) / 1024, 1),
+                "retained": round((after - before) / 1024, 1),
+            },
+        }
+
+    def compare(self, baseline, results, threshold):
+        """report operations that got slower or issue more queries than a baseline run"""
+        regressions = 0
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if result["queries"]["max"] > before["queries"]["max"]:
+                self.stdout.write(f"{name}: queries {before['queries']['max']} -> {result['queries']['max']}")
+                regressions += 1
+            old, new = before["latency_ms"]["p50"], result["latency_ms"]["p50"]
+            if old and (new - old) / old > threshold:
+                self.stdout.write(f"{name}: p50 {old}ms -> {new}ms")
+                regressions += 1
+        self.stdout.write(f"{regressions} regressions against baseline")
@@ -0,0 +1,163 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from core.pagination import KeysetPaginator
+from core.seeding import seed_tenant
+from orgs.models import Organization
+from projects.models import Project
+from tasks.models import Task
+from tasks.schema import TASK_ORDERING
+
+OPERATIONS = {
+    "projects": "{ projects { id name status } }",
+    "projectsWithTasks": "{ projects { id name status tasks { id title description status } } }",
+    "tasks": "query($projectId: ID!) { tasks(projectId: $projectId) { id title status } }",
+    "tasksConnection": (
+        "query($projectId: ID!, $after: String) {"
+        " tasksConnection(projectId: $projectId, first: 50, after: $after) {"
+        " edges { node { id title status } } } }"
+    ),
+    "tasksConnectionDeep": (
+        "query($projectId: ID!, $after: String) {"
+        " tasksConnection(projectId: $projectId, first: 50, after: $after) {"
+        " edges { node { id title status } } } }"
+    ),
+    "taskComments": "query($taskId: ID!) { taskComments(taskId: $taskId) { id content } }",
+    "projectStats": (
+        "query($projectId: ID!) { projectStats(projectId: $projectId) {"
+        " totalTasks completedTasks overdueTasks } }"
+    ),
+    "projectStatsBatch": (
+        "query($projectIds: [ID!]!) { projectStatsBatch(projectIds: $projectIds) {"
+        " projectId totalTasks overdueTasks } }"
+    ),
+}
+
+
+def plan_summary(plan):
+    """node types and index names used anywhere in an explain plan"""
+    nodes, indexes = [], []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        nodes.append(f"{node['Node Type']} on {node['Relation Name']}" if "Relation Name" in node else node["Node Type"])
+        if "Index Name" in node:
+            indexes.append(node["Index Name"])
+        stack.extend(node.get("Plans", []))
+    return nodes, sorted(set(indexes))
+
+
+class Command(BaseCommand):
+    help = "record explain analyze plans for every graphql resolver"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", default="bench", help="organization slug to benchmark")
+        parser.add_argument("--seed", action="store_true", help="seed the organization first")
+        parser.add_argument("--projects", type=int, default=200)
+        parser.add_argument("--tasks", type=int, default=5000, help="tasks per project")
+        parser.add_argument("--comments", type=int, default=1, help="comments per task")
+        parser.add_argument("--output", default="explain_plans.json")
+        parser.add_argument("--baseline", help="earlier output to compare plans against")
+
+    def handle(self, *args, **options):
+        org, _ = Organization.objects.get_or_create(
+            slug=options["org"],
+            defaults={"name": options["org"], "contact_email": f"bench@{options['org']}.example.com"},
+        )
+        if options["seed"]:
+            seed_tenant(org, options["projects"], options["tasks"], options["comments"])
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        variables = self.variables(org)
+        client = Client(SERVER_NAME="localhost")
+        results = {}
+        for name, query in OPERATIONS.items():
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.post(
+                    "/graphql/",
+                    {"query": query, "variables": variables[name]},
+                    content_type="application/json",
+                    headers={"X-ORG-SLUG": org.slug},
+                )
+            if "errors" in response.json():
+                self.stderr.write(f"{name}: {response.json()['errors']}")
+            results[name] = [self.explain(q["sql"]) for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+
+        report = {
+            "dataset": {
+                "projects": Project.objects.filter(organization=org).count(),
+                "tasks": Task.objects.filter(project__organization=org).count(),
+            },
+            "operations": results,
+        }
+        with open(options["output"], "w") as fh:
+            json.dump(report, fh, indent=2, default=str)
+
+        for name, queries in results.items():
+            total = sum(q["execution_ms"] for q in queries)
+            self.stdout.write(f"{name}: {len(queries)} queries, {total:.2f} ms")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                self.compare(json.load(fh)["operations"], results)
+
+    def variables(self, org):
+        """variables for each operation, picked from the seeded data"""
+        project = Project.objects.filter(organization=org).order_by("-task_count").first()
+        project_id = project.id if project else 0
+        task = Task.objects.filter(project_id=project_id).first()
+        deep = Task.objects.filter(project_id=project_id).order_by("-created_at", "-id")[
+            max(project.task_count // 2 - 1, 0) if project else 0:
+        ].first()
+        paginator = KeysetPaginator(Task.objects.all(), TASK_ORDERING)
+        project_ids = list(Project.objects.filter(organization=org).values_list("id", flat=True)[:50])
+
+        base = {"projectId": project_id}
+        return {
+            "projects": {},
+            "projectsWithTasks": {},
+            "tasks": base,
+            "tasksConnection": base,
+            "tasksConnectionDeep": {**base, "after": paginator.encode_cursor(deep) if deep else None},
+            "taskComments": {"taskId": task.id if task else 0},
+            "projectStats": base,
+            "projectStatsBatch": {"projectIds": project_ids},
+        }
+
+    def explain(self, sql):
+        """run explain analyze for one captured statement"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+            explained = cursor.fetchone()[0]
+        if isinstance(explained, str):
+            explained = json.loads(explained)
+        plan = explained[0]
+        nodes, indexes = plan_summary(plan["Plan"])
+        return {
+            "sql": sql,
+            "execution_ms": plan["Execution Time"],
+            "nodes": nodes,
+            "indexes": indexes,
+            "plan": plan["Plan"],
+        }
+
+    def compare(self, baseline, results):
+        """report operations whose plans changed against a baseline run"""
+        regressions = 0
+        for name, queries in results.items():
+            before = baseline.get(name, [])
+            if len(before) != len(queries):
+                self.stdout.write(f"{name}: query count {len(before)} -> {len(queries)}")
+                regressions += 1
+                continue
+            for old, new in zip(before, queries):
+                seq_scans = [n for n in new["nodes"] if n.startswith("Seq Scan") and n not in old["nodes"]]
+                if seq_scans or old["indexes"] != new["indexes"]:
+                    self.stdout.write(f"{name}: indexes {old['indexes']} -> {new['indexes']} {seq_scans}")
+                    regressions += 1
+        self.stdout.write(f"{regressions} plan changes against baseline")
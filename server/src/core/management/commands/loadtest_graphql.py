@@ -0,0 +1,103 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+from core.documents import client_documents
+
+DEFAULT_QUERY = """
+query dashboard {
+    projects { id name status tasks { id title status } }
+}
+"""
+
+
+def summarize(latencies, elapsed):
+    """requests/sec and latency percentiles in milliseconds"""
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+    }
+
+
+def ensure_ok(response):
+    """fail the run on http or graphql errors"""
+    payload = response.json()
+    if response.status_code != 200 or payload.get("errors"):
+        raise Exception(f"GraphQL request failed: {payload}")
+
+
+class Command(BaseCommand):
+    help = "compare throughput and tail latency of the sync and async graphql views"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", required=True, help="organization slug to query as")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--operation", help="client operation name to replay instead of the default query")
+        parser.add_argument("--variables", default="{}", help="json variables for the operation")
+        parser.add_argument("--output", help="write results as json to this file")
+
+    def handle(self, *args, **options):
+        query = DEFAULT_QUERY
+        if options["operation"]:
+            query = client_documents()[options["operation"]]
+        body = {"query": query, "variables": json.loads(options["variables"])}
+        headers = {"X-ORG-SLUG": options["org"]}
+
+        # the in-process clients send requests for the "testserver" host
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            results = {
+                "wsgi": self.run_threads("/graphql/", body, headers, options),
+                "asgi": asyncio.run(self.run_async("/graphql/async/", body, headers, options)),
+            }
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name}: {result['requests_per_sec']} req/s, "
+                f"p50 {result['p50_ms']}ms, p99 {result['p99_ms']}ms"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def run_threads(self, path, body, headers, options):
+        """requests through the sync view from a pool of worker threads"""
+        def request(_):
+            start = time.perf_counter()
+            response = Client().post(path, body, content_type="application/json", headers=headers)
+            ensure_ok(response)
+            latency = time.perf_counter() - start
+            connections.close_all()
+            return latency
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            latencies = list(pool.map(request, range(options["requests"])))
+        return summarize(latencies, time.perf_counter() - start)
+
+    async def run_async(self, path, body, headers, options):
+        """requests through the async view from concurrent tasks on one loop"""
+        client = AsyncClient()
+        slots = asyncio.Semaphore(options["concurrency"])
+
+        async def request():
+            async with slots:
+                start = time.perf_counter()
+                response = await client.post(path, body, content_type="application/json", headers=headers)
+                ensure_ok(response)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(request() for _ in range(options["requests"])))
+        return summarize(latencies, time.perf_counter() - start)
@@ -1,20 +1,90 @@
-from orgs.models import Organization
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.profiling import RequestProfile, current_profile, metrics, profiling_settings
+from orgs.cache import organization_cache
 
 
 class OrganizationMiddleware:
     """middleware to extract organization from request headers"""
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         slug = request.headers.get("X-ORG-SLUG")
 
         if slug:
-            try:
-                request.organization = Organization.objects.get(slug=slug)
-            except Organization.DoesNotExist:
-                request.organization = None
+            request.organization = organization_cache.get(slug)
         else:
             request.organization = None
 
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        slug = request.headers.get("X-ORG-SLUG")
+
+        if slug:
+            request.organization = await organization_cache.aget(slug)
+        else:
+            request.organization = None
+
+        return await self.get_response(request)
+
+
+class ProfilingMiddleware:
+    """middleware recording sql and resolver timings when PROFILING is enabled
+
+    every request feeds the metrics histograms; requests carrying the
+    profiling header also get a full trace in the response extensions.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = profiling_settings()
+        if not options["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.header = options["HEADER"]
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with self.profiling(request) as profile:
+            response = self.get_response(request)
+        self.finish(profile)
+        return response
+
+    async def __acall__(self, request):
+        with self.profiling(request) as profile:
+            response = await self.get_response(request)
+        self.finish(profile)
+        return response
+
+    @contextmanager
+    def profiling(self, request):
+        """make a profile for request current while it is handled"""
+        profile = RequestProfile(trace=bool(request.headers.get(self.header)))
+        request.profile = profile
+        token = current_profile.set(profile)
+        try:
+            yield profile
+        finally:
+            current_profile.reset(token)
+
+    @staticmethod
+    def finish(profile):
+        metrics.observe_request(profile, profile.offset() / 1e9)
@@ -0,0 +1,182 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, QuerySet
+from graphene.utils.str_converters import to_snake_case
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    get_named_type,
+)
+
+from core.dataloader import get_loaders
+from core.execution import is_async
+
+
+def collect_fields(info, nodes):
+    """merge the selections of nodes into a name -> [FieldNode] mapping"""
+    fields = {}
+    for node in nodes:
+        if node.selection_set is None:
+            continue
+        for selection in node.selection_set.selections:
+            if isinstance(selection, FieldNode):
+                fields.setdefault(selection.name.value, []).append(selection)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = info.fragments[selection.name.value]
+                for name, found in collect_fields(info, [fragment]).items():
+                    fields.setdefault(name, []).extend(found)
+            elif isinstance(selection, InlineFragmentNode):
+                for name, found in collect_fields(info, [selection]).items():
+                    fields.setdefault(name, []).extend(found)
+    return fields
+
+
+class QueryPlan:
+    """only/select_related/prefetch_related lookups for one queryset"""
+    def __init__(self):
+        self.only = set()
+        self.select_related = set()
+        self.prefetch_related = []
+        self.restrict_fields = True
+
+    def apply(self, queryset):
+        """apply the plan to queryset"""
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.restrict_fields:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def plan(info, graphql_type, nodes, model):
+    """build a query plan for model from the selected fields of nodes"""
+    query_plan = QueryPlan()
+    graphene_type = getattr(graphql_type, "graphene_type", None)
+    graphene_fields = getattr(getattr(graphene_type, "_meta", None), "fields", {})
+
+    for name, field_nodes in collect_fields(info, nodes).items():
+        if name == "__typename":
+            continue
+
+        field_name = to_snake_case(name)
+        try:
+            model_field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            # custom resolvers may read any column, so fetch them all
+            if field_name in graphene_fields:
+                query_plan.restrict_fields = False
+            continue
+
+        if not model_field.is_relation:
+            query_plan.only.add(model_field.name)
+            continue
+
+        child_type = get_named_type(graphql_type.fields[name].type)
+        related_model = model_field.related_model
+
+        if model_field.concrete and (model_field.many_to_one or model_field.one_to_one):
+            child = plan(info, child_type, field_nodes, related_model)
+            query_plan.only.add(model_field.name)
+            query_plan.select_related.add(model_field.name)
+            query_plan.select_related.update(
+                f"{model_field.name}__{lookup}" for lookup in child.select_related
+            )
+            if child.restrict_fields:
+                query_plan.only.update(
+                    f"{model_field.name}__{lookup}" for lookup in child.only
+                )
+            else:
+                query_plan.restrict_fields = False
+            query_plan.prefetch_related.extend(
+                Prefetch(
+                    f"{model_field.name}__{prefetch.prefetch_through}",
+                    queryset=prefetch.queryset,
+                )
+                for prefetch in child.prefetch_related
+            )
+        elif model_field.one_to_many or model_field.many_to_many:
+            child = plan(info, child_type, field_nodes, related_model)
+            if model_field.one_to_many:
+                child.only.add(model_field.field.name)
+            queryset = related_model._default_manager.order_by(
+                *related_model._meta.ordering
+            )
+            query_plan.prefetch_related.append(
+                Prefetch(model_field.name, queryset=child.apply(queryset))
+            )
+        else:
+            query_plan.restrict_fields = False
+
+    return query_plan
+
+
+def optimize(queryset, info):
+    """narrow queryset to what the selection set in info needs"""
+    graphql_type = get_named_type(info.return_type)
+    if not hasattr(graphql_type, "fields"):
+        return queryset
+    return plan(info, graphql_type, info.field_nodes, queryset.model).apply(queryset)
+
+
+def selected_columns(info, model, field_name):
+    """concrete columns selected under field_name of the current field
+
+    returns None when anything other than plain model columns is selected.
+    """
+    nodes = collect_fields(info, info.field_nodes).get(field_name, [])
+    columns = set()
+    for name in collect_fields(info, nodes):
+        if name == "__typename":
+            continue
+        try:
+            model_field = model._meta.get_field(to_snake_case(name))
+        except FieldDoesNotExist:
+            return None
+        if model_field.is_relation or not model_field.concrete:
+            return None
+        columns.add(model_field.name)
+    return columns
+
+
+def is_model_field(model, name):
+    """whether name is a field of model rather than an annotation"""
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def optimize_nodes(queryset, info, extra_fields=()):
+    """narrow queryset to the edges { node } selection of a connection"""
+    # annotations, such as a search rank, are selected whatever only() says
+    extra_fields = [field for field in extra_fields if is_model_field(queryset.model, field)]
+    connection_type = get_named_type(info.return_type)
+    edge_nodes = collect_fields(info, info.field_nodes).get("edges", [])
+    node_nodes = collect_fields(info, edge_nodes).get("node", [])
+    if not node_nodes:
+        return queryset.only(*extra_fields) if extra_fields else queryset
+
+    edge_type = get_named_type(connection_type.fields["edges"].type)
+    node_type = get_named_type(edge_type.fields["node"].type)
+    query_plan = plan(info, node_type, node_nodes, queryset.model)
+    query_plan.only.update(extra_fields)
+    return query_plan.apply(queryset)
+
+
+class QueryOptimizerMiddleware:
+    """graphene middleware that plans every queryset returned by a resolver"""
+    def resolve(self, next, root, info, **args):
+        result = next(root, info, **args)
+        if isinstance(result, QuerySet) and result._result_cache is None:
+            if is_async(info):
+                return self.aregister(info, optimize(result, info))
+            result = get_loaders(info).register(optimize(result, info))
+        return result
+
+    @staticmethod
+    async def aregister(info, queryset):
+        """evaluate queryset with async iteration and register the rows"""
+        return get_loaders(info).register([obj async for obj in queryset])
@@ -0,0 +1,173 @@
+import base64
+import json
+
+import graphene
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+from core.dataloader import get_loaders
+from core.execution import with_async
+from core.optimizer import optimize_nodes
+
+
+class CountableConnection(graphene.relay.Connection):
+    """relay connection with a total count computed only when selected"""
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int()
+
+    async def aresolve_total_count(self, info):
+        return await self.queryset.order_by().acount()
+
+    @with_async(aresolve_total_count)
+    def resolve_total_count(self, info):
+        """count the unpaginated queryset"""
+        return self.queryset.order_by().count()
+
+
+def connection_args():
+    """first/after/last/before arguments for a connection field"""
+    return {
+        "first": graphene.Int(),
+        "after": graphene.String(),
+        "last": graphene.Int(),
+        "before": graphene.String(),
+    }
+
+
+class KeysetPaginator:
+    """keyset pagination over an ordering of (field, descending) pairs"""
+    def __init__(self, queryset, ordering):
+        self.queryset = queryset
+        self.ordering = ordering
+
+    def encode_cursor(self, obj):
+        """opaque cursor holding the ordering values of obj"""
+        values = [getattr(obj, field) for field, _ in self.ordering]
+        raw = json.dumps(values, default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, cursor):
+        """ordering values stored in cursor"""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except ValueError:
+            raise Exception("Invalid cursor")
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise Exception("Invalid cursor")
+
+        decoded = []
+        for (field, _), value in zip(self.ordering, values):
+            try:
+                value = self.queryset.model._meta.get_field(field).to_python(value)
+            except FieldDoesNotExist:
+                pass
+            except ValidationError:
+                raise Exception("Invalid cursor")
+            decoded.append(value)
+        return decoded
+
+    def seek(self, cursor, forward):
+        """filter matching rows strictly after (or before) cursor"""
+        values = self.decode_cursor(cursor)
+        condition = Q()
+        for index, (field, descending) in enumerate(self.ordering):
+            lookup = "lt" if descending == forward else "gt"
+            step = Q(**{f"{field}__{lookup}": values[index]})
+            for previous in range(index):
+                step &= Q(**{self.ordering[previous][0]: values[previous]})
+            condition |= step
+        return condition
+
+    def order_by(self, forward):
+        """order_by expressions for the requested direction"""
+        return [
+            f"-{field}" if descending == forward else field
+            for field, descending in self.ordering
+        ]
+
+    def window(self, first=None, after=None, last=None, before=None):
+        """sliced queryset for the page plus how to read its rows"""
+        if first is not None and last is not None:
+            raise Exception("Use either first or last, not both")
+
+        max_size = getattr(settings, "GRAPHQL_MAX_PAGE_SIZE", 100)
+        size = first if first is not None else last
+        size = max_size if size is None else size
+        if size < 0:
+            raise Exception("Page size must not be negative")
+        size = min(size, max_size)
+
+        queryset = self.queryset
+        if after:
+            queryset = queryset.filter(self.seek(after, forward=True))
+        if before:
+            queryset = queryset.filter(self.seek(before, forward=False))
+
+        forward = last is None
+        sliced = queryset.order_by(*self.order_by(forward))[:size + 1]
+        return sliced, (size, forward, bool(after), bool(before))
+
+    @staticmethod
+    def read(rows, shape):
+        """return (rows, has_previous_page, has_next_page) for a fetched window"""
+        size, forward, after, before = shape
+        has_more = len(rows) > size
+        rows = rows[:size]
+
+        if forward:
+            return rows, after, has_more
+        rows.reverse()
+        return rows, has_more, before
+
+    def page(self, **args):
+        """fetch one page"""
+        sliced, shape = self.window(**args)
+        return self.read(list(sliced), shape)
+
+    async def apage(self, **args):
+        """fetch one page with async iteration"""
+        sliced, shape = self.window(**args)
+        return self.read([row async for row in sliced], shape)
+
+
+def connection_from_queryset(connection_type, queryset, info, ordering, **args):
+    """build a keyset paginated connection over queryset"""
+    paginator = paginator_for(queryset, info, ordering)
+    return build_connection(connection_type, queryset, info, paginator, paginator.page(**args))
+
+
+async def aconnection_from_queryset(connection_type, queryset, info, ordering, **args):
+    """connection_from_queryset using async iteration"""
+    paginator = paginator_for(queryset, info, ordering)
+    return build_connection(connection_type, queryset, info, paginator, await paginator.apage(**args))
+
+
+def paginator_for(queryset, info, ordering):
+    """paginator over queryset narrowed to the selected node fields"""
+    planned = optimize_nodes(queryset, info, extra_fields=[field for field, _ in ordering])
+    return KeysetPaginator(planned, ordering)
+
+
+def build_connection(connection_type, queryset, info, paginator, page):
+    """wrap a fetched page into connection_type"""
+    rows, has_previous, has_next = page
+    get_loaders(info).register(rows)
+
+    edges = [
+        connection_type.Edge(node=row, cursor=paginator.encode_cursor(row))
+        for row in rows
+    ]
+    connection = connection_type(
+        edges=edges,
+        page_info=graphene.relay.PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=has_previous,
+            has_next_page=has_next,
+        ),
+    )
+    connection.queryset = queryset
+    return connection
@@ -0,0 +1,231 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from inspect import isawaitable
+
+from django.conf import settings
+
+current_profile = ContextVar("current_profile", default=None)
+current_field = ContextVar("current_field", default=None)
+
+IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+
+
+def profiling_settings():
+    """the PROFILING setting with defaults filled in"""
+    options = getattr(settings, "PROFILING", {})
+    return {
+        "ENABLED": options.get("ENABLED", False),
+        "HEADER": options.get("HEADER", "X-GRAPHQL-PROFILE"),
+        "MAX_SERIES": options.get("MAX_SERIES", 200),
+    }
+
+
+def fingerprint(sql):
+    """sql with IN (...) lists collapsed, so batched lookups of any size match"""
+    return IN_LIST.sub("(...)", sql)
+
+
+class RequestProfile:
+    """sql and resolver timings of one request
+
+    query counts and time are always kept; individual queries and
+    resolver timings only when trace is set.
+    """
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter_ns()
+        self.operation_name = None
+        self.query_count = 0
+        self.query_ns = 0
+        self.queries = []
+        self.resolvers = []
+
+    def offset(self):
+        return time.perf_counter_ns() - self.start
+
+    def record_query(self, sql, params, duration):
+        self.query_count += 1
+        self.query_ns += duration
+        if self.trace:
+            self.queries.append((fingerprint(sql), repr(params), duration, current_field.get()))
+
+    def record_resolver(self, info, path, start, end):
+        self.resolvers.append({
+            "path": path,
+            "parentType": info.parent_type.name,
+            "fieldName": info.field_name,
+            "returnType": str(info.return_type),
+            "startOffset": start - self.start,
+            "duration": end - start,
+        })
+
+    def extensions(self):
+        """apollo tracing plus sql statistics per field"""
+        duration = self.offset()
+        ended_at = self.started_at.timestamp() + duration / 1e9
+
+        by_field = defaultdict(lambda: {"count": 0, "durationMs": 0.0})
+        statements = defaultdict(list)
+        for sql, params, query_ns, path in self.queries:
+            field = ".".join(str(key) for key in path) if path else "(request)"
+            by_field[field]["count"] += 1
+            by_field[field]["durationMs"] += query_ns / 1e6
+            statements[sql].append((params, field))
+
+        duplicates = [
+            {
+                "fingerprint": sql,
+                "count": len(calls),
+                "identical": len(calls) - len({params for params, _ in calls}),
+                "fields": sorted({field for _, field in calls}),
+            }
+            for sql, calls in statements.items()
+            if len(calls) > 1
+        ]
+        return {
+            "tracing": {
+                "version": 1,
+                "startTime": self.started_at.isoformat(),
+                "endTime": datetime.fromtimestamp(ended_at, timezone.utc).isoformat(),
+                "duration": duration,
+                "execution": {"resolvers": self.resolvers},
+            },
+            "sql": {
+                "count": self.query_count,
+                "durationMs": round(self.query_ns / 1e6, 3),
+                "byField": {
+                    field: {"count": stats["count"], "durationMs": round(stats["durationMs"], 3)}
+                    for field, stats in by_field.items()
+                },
+                "duplicates": duplicates,
+            },
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    """database execute_wrapper adding each query to the current profile
+
+    installed on every connection; the profile travels in a context
+    variable, so queries the async orm runs on worker threads count too.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter_ns()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, params, time.perf_counter_ns() - start)
+
+
+class ResolverProfilingMiddleware:
+    """graphene middleware timing resolvers of traced requests"""
+    def resolve(self, next, root, info, **args):
+        profile = current_profile.get()
+        if profile is None or not profile.trace:
+            return next(root, info, **args)
+
+        path = info.path.as_list()
+        token = current_field.set(path)
+        start = time.perf_counter_ns()
+        try:
+            result = next(root, info, **args)
+        finally:
+            current_field.reset(token)
+
+        if isawaitable(result):
+            return self.await_result(profile, info, path, start, result)
+        profile.record_resolver(info, path, start, time.perf_counter_ns())
+        return result
+
+    @staticmethod
+    async def await_result(profile, info, path, start, result):
+        token = current_field.set(path)
+        try:
+            return await result
+        finally:
+            current_field.reset(token)
+            profile.record_resolver(info, path, start, time.perf_counter_ns())
+
+
+class Histogram:
+    """cumulative bucket counts, sum and count of observed values"""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Metrics:
+    """in-process histograms of profiled requests, rendered for prometheus"""
+    families = {
+        "graphql_request_duration_seconds": ("operation", LATENCY_BUCKETS),
+        "graphql_request_sql_queries": ("operation", QUERY_COUNT_BUCKETS),
+        "graphql_request_sql_duration_seconds": ("operation", LATENCY_BUCKETS),
+        "graphql_resolver_duration_seconds": ("field", LATENCY_BUCKETS),
+    }
+
+    def __init__(self, max_series=200):
+        self.max_series = max_series
+        self._series = {name: {} for name in self.families}
+        self._lock = threading.Lock()
+
+    def observe(self, name, label, value):
+        with self._lock:
+            series = self._series[name]
+            if label not in series and len(series) >= self.max_series:
+                # clients choose operation names, so cap how many are tracked
+                label = "other"
+            if label not in series:
+                series[label] = Histogram(self.families[name][1])
+            series[label].observe(value)
+
+    def observe_request(self, profile, duration):
+        """record a finished request"""
+        operation = profile.operation_name or "anonymous"
+        self.observe("graphql_request_duration_seconds", operation, duration)
+        self.observe("graphql_request_sql_queries", operation, profile.query_count)
+        self.observe("graphql_request_sql_duration_seconds", operation, profile.query_ns / 1e9)
+        for resolver in profile.resolvers:
+            field = f"{resolver['parentType']}.{resolver['fieldName']}"
+            self.observe("graphql_resolver_duration_seconds", field, resolver["duration"] / 1e9)
+
+    def render(self):
+        """prometheus text exposition of every histogram"""
+        lines = []
+        with self._lock:
+            for name, (label_name, buckets) in self.families.items():
+                lines.append(f"# TYPE {name} histogram")
+                for label, histogram in sorted(self._series[name].items()):
+                    labels = f'{label_name}="{label}"'
+                    cumulative = 0
+                    for bound, count in zip((*buckets, "+Inf"), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._series = {name: {} for name in self.families}
+
+
+metrics = Metrics(max_series=profiling_settings()["MAX_SERIES"])
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Broker:
+    """publish/subscribe interface that subscriptions fan out through"""
+
+    def publish(self, channel, message):
+        """deliver message to every current subscriber of channel"""
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """async iterator of messages published to channel from now on
+
+        the subscription is registered before this returns, and is
+        released by aclose().
+        """
+        raise NotImplementedError
+
+
+class LocalSubscription:
+    """messages for one subscriber of a LocalBroker channel"""
+    def __init__(self, broker, channel, max_queue):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_queue)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    async def aclose(self):
+        """stop receiving messages"""
+        self.broker.unsubscribe(self)
+
+    def offer(self, message):
+        # a subscriber that cannot keep up loses messages rather than memory
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+
+class LocalBroker(Broker):
+    """in-process broker; publishers may run on any thread"""
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+            except RuntimeError:
+                # the subscriber's event loop has already shut down
+                self.unsubscribe(subscriber)
+
+    def subscribe(self, channel):
+        subscription = LocalSubscription(self, channel, self.max_queue)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """drop subscription from its channel"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel):
+        """number of subscribers currently listening on channel"""
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+def broker_from_settings():
+    """build the broker named by the SUBSCRIPTIONS setting"""
+    options = getattr(settings, "SUBSCRIPTIONS", {})
+    broker_class = import_string(options.get("BROKER", "core.pubsub.LocalBroker"))
+    return broker_class(**options.get("BROKER_OPTIONS", {}))
+
+
+broker = broker_from_settings()
+
+
+def publish_on_commit(channel, message):
+    """publish message once the current transaction commits"""
+    transaction.on_commit(lambda: broker.publish(channel, message))
@@ -0,0 +1,228 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Model
+
+
+def instance_tag(model, pk):
+    """tag naming one row, e.g. projects.project:5"""
+    return f"{model._meta.label_lower}:{pk}"
+
+
+def skip_response_cache(info):
+    """keep the response being executed out of the response cache"""
+    info.context.response_cache_key = None
+
+
+class CachedResponse:
+    """execution result data for one cached query"""
+    def __init__(self, data, tags, versions, expires_at, size):
+        self.data = data
+        self.tags = tags
+        self.versions = versions
+        self.expires_at = expires_at
+        self.size = size
+
+
+class TenantBucket:
+    """lru of one tenant's responses bounded by their serialized size"""
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+        return entry
+
+
+class ResponseCache:
+    """tenant scoped cache of query results invalidated by row tags
+
+    entries live in process memory, capped per tenant. tag versions live
+    in a django cache so a write in one process invalidates entries held
+    by every other process sharing that cache.
+    """
+    version_prefix = "response-tag:"
+
+    def __init__(
+        self,
+        max_bytes_per_tenant=1024 * 1024,
+        max_tenants=1000,
+        ttl=300,
+        backend="default",
+        clock=time.monotonic,
+    ):
+        self.max_bytes_per_tenant = max_bytes_per_tenant
+        self.max_tenants = max_tenants
+        self.ttl = ttl
+        self.backend = backend
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._tenants = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        """build the cache from the RESPONSE_CACHE setting"""
+        options = getattr(settings, "RESPONSE_CACHE", {})
+        return cls(
+            max_bytes_per_tenant=options.get("MAX_BYTES_PER_TENANT", 1024 * 1024),
+            max_tenants=options.get("MAX_TENANTS", 1000),
+            ttl=options.get("TTL", 300),
+            backend=options.get("TAG_BACKEND", "default"),
+        )
+
+    @property
+    def enabled(self):
+        return self.max_bytes_per_tenant > 0 and self.ttl > 0
+
+    @staticmethod
+    def key(cached_document, operation_name, variables):
+        """entry key for a document run with operation_name and variables"""
+        return json.dumps(
+            [cached_document.normalized_hash, operation_name, variables or {}],
+            sort_keys=True,
+            default=str,
+        )
+
+    def get(self, tenant, key):
+        """cached data for key, or None if missing, expired or invalidated"""
+        with self._lock:
+            bucket = self._tenants.get(tenant)
+            entry = bucket.entries.get(key) if bucket else None
+            if entry is None or entry.expires_at <= self.clock():
+                if entry is not None:
+                    bucket.pop(key)
+                self.misses += 1
+                return None
+
+        if self._versions(entry.tags) != entry.versions:
+            with self._lock:
+                bucket.pop(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            bucket.entries.move_to_end(key)
+            self._tenants.move_to_end(tenant)
+            self.hits += 1
+        return entry.data
+
+    def put(self, tenant, key, data, tags):
+        """store data tagged with the rows it was built from"""
+        size = len(json.dumps(data, default=str))
+        if size > self.max_bytes_per_tenant:
+            return
+
+        tags = sorted(tags)
+        entry = CachedResponse(data, tags, self._versions(tags), self.clock() + self.ttl, size)
+        with self._lock:
+            bucket = self._tenants.get(tenant)
+            if bucket is None:
+                bucket = self._tenants[tenant] = TenantBucket()
+            bucket.pop(key)
+            bucket.entries[key] = entry
+            bucket.size += size
+            self._tenants.move_to_end(tenant)
+
+            while bucket.size > self.max_bytes_per_tenant:
+                bucket.pop(next(iter(bucket.entries)))
+            while len(self._tenants) > self.max_tenants:
+                self._tenants.popitem(last=False)
+
+    def invalidate(self, tags):
+        """make every entry tagged with any of tags stale"""
+        token = uuid.uuid4().hex
+        caches[self.backend].set_many(
+            {self.version_prefix + tag: token for tag in tags},
+            timeout=None,
+        )
+
+    def invalidate_on_commit(self, tags):
+        """invalidate tags once the current transaction commits"""
+        tags = set(tags)
+        transaction.on_commit(lambda: self.invalidate(tags))
+
+    def clear(self):
+        """drop every local entry and reset counters"""
+        with self._lock:
+            self._tenants.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """hit/miss counters and bytes held per tenant"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "tenants": {tenant: bucket.size for tenant, bucket in self._tenants.items()},
+            }
+
+    def _versions(self, tags):
+        cache = caches[self.backend]
+        keys = [self.version_prefix + tag for tag in tags]
+        versions = cache.get_many(keys)
+        missing = [key for key in keys if key not in versions]
+        if missing:
+            # untouched tags get a version so later invalidations change it
+            for key in missing:
+                cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions.update(cache.get_many(missing))
+        return [versions.get(key) for key in keys]
+
+
+response_cache = ResponseCache.from_settings()
+
+
+class ResponseCacheTagMiddleware:
+    """graphene middleware recording which rows a query response was built from"""
+    def __init__(self):
+        self._argument_models = None
+
+    def resolve(self, next, root, info, **args):
+        tags = getattr(info.context, "response_cache_tags", None)
+        if tags is not None:
+            if isinstance(root, Model):
+                tags.add(instance_tag(type(root), root.pk))
+            elif info.path.prev is None:
+                tags.update(self.root_tags(info, args))
+        return next(root, info, **args)
+
+    def root_tags(self, info, args):
+        """tags for the rows a root field was asked about
+
+        a root field without id arguments lists the organization's rows,
+        so it is tagged with the organization itself.
+        """
+        found = []
+        for name, value in args.items():
+            model = self.argument_model(name)
+            if model is None:
+                continue
+            values = value if isinstance(value, (list, tuple)) else [value]
+            found.extend(instance_tag(model, pk) for pk in values)
+
+        organization = getattr(info.context, "organization", None)
+        if not found and organization is not None:
+            found.append(instance_tag(type(organization), organization.pk))
+        return found
+
+    def argument_model(self, name):
+        """model an argument such as project_id or task_ids refers to"""
+        if self._argument_models is None:
+            self._argument_models = {model._meta.model_name: model for model in apps.get_models()}
+        for suffix in ("_ids", "_id"):
+            if name.endswith(suffix):
+                return self._argument_models.get(name[: -len(suffix)].replace("_", ""))
+        return None
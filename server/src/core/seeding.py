@@ -0,0 +1,85 @@
+import random
+from datetime import timedelta
+
+from django.db.models import DateTimeField, ExpressionWrapper, F, Value
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from projects.counters import recompute_task_counters
+from projects.models import Project
+from tasks.models import Task, TaskComment
+from tasks.search import refresh_search_vectors
+
+STATUSES = [status for status, _ in Task.STATUS_CHOICES]
+
+
+def spread_created_at(queryset, step):
+    """rewrite auto_now_add timestamps so rows are spread back in time by id"""
+    queryset.update(
+        created_at=ExpressionWrapper(
+            Now() - F("id") * Value(step),
+            output_field=DateTimeField(),
+        )
+    )
+
+
+def seed_tenant(org, projects, tasks, comments, batch_size=10000, seed=0):
+    """bulk insert projects x tasks x comments for org"""
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    existing = Project.objects.filter(organization=org).count()
+    created_projects = Project.objects.bulk_create(
+        [
+            Project(
+                organization=org,
+                name=f"Project {existing + i}",
+                description="",
+                status="ACTIVE",
+            )
+            for i in range(projects)
+        ],
+        batch_size=batch_size,
+    )
+
+    pending = []
+    for project in created_projects:
+        for i in range(tasks):
+            pending.append(
+                Task(
+                    project=project,
+                    title=f"Task {i}",
+                    description="lorem ipsum " * rng.randint(0, 50),
+                    status=rng.choice(STATUSES),
+                    assignee_email=f"user{rng.randint(0, 49)}@{org.slug}.example.com",
+                    due_date=now + timedelta(days=rng.randint(-30, 30)) if rng.random() < 0.5 else None,
+                )
+            )
+            if len(pending) >= batch_size:
+                seed_comments(Task.objects.bulk_create(pending), comments, batch_size)
+                pending = []
+    if pending:
+        seed_comments(Task.objects.bulk_create(pending), comments, batch_size)
+
+    project_ids = [project.id for project in created_projects]
+    spread_created_at(Project.objects.filter(id__in=project_ids), timedelta(hours=1))
+    spread_created_at(Task.objects.filter(project_id__in=project_ids), timedelta(seconds=1))
+    spread_created_at(
+        TaskComment.objects.filter(task__project_id__in=project_ids),
+        timedelta(seconds=1),
+    )
+    recompute_task_counters(Project.objects.filter(id__in=project_ids))
+    refresh_search_vectors(Task.objects.filter(project_id__in=project_ids))
+    return created_projects
+
+
+def seed_comments(tasks, comments, batch_size):
+    """bulk insert comments for freshly created tasks"""
+    TaskComment.objects.bulk_create(
+        [
+            TaskComment(task=task, content=f"Comment {i}", author_email="seed@example.com")
+            for task in tasks
+            for i in range(comments)
+        ],
+        batch_size=batch_size,
+    )
@@ -0,0 +1,412 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+
+class ExplainResolversCommandTest(TestCase):
+    """test explain plan benchmark command"""
+
+    def test_records_plan_for_every_operation(self):
+        """test each operation is seeded, executed and explained"""
+        from core.management.commands.explain_resolvers import OPERATIONS
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "plans.json")
+            call_command(
+                "explain_resolvers",
+                seed=True,
+                projects=2,
+                tasks=5,
+                comments=1,
+                output=output,
+                stdout=StringIO(),
+            )
+            with open(output) as fh:
+                report = json.load(fh)
+
+        self.assertEqual(report["dataset"], {"projects": 2, "tasks": 10})
+        self.assertEqual(set(report["operations"]), set(OPERATIONS))
+        plan = report["operations"]["tasksConnection"][-1]
+        self.assertIn("tasks_task", plan["sql"])
+        self.assertGreaterEqual(plan["execution_ms"], 0)
+
+
+class BenchGraphQLCommandTest(TestCase):
+    """test client document benchmark command"""
+
+    def run_bench(self, tmp, name, **options):
+        output = os.path.join(tmp, name)
+        stdout = StringIO()
+        call_command(
+            "bench_graphql", org="load-0-0", iterations=2, warmup=0,
+            output=output, stdout=stdout, **options,
+        )
+        with open(output) as fh:
+            return json.load(fh), stdout.getvalue()
+
+    def test_replays_client_documents(self):
+        """test every client operation is measured and mutations are rolled back"""
+        from core.documents import client_documents
+        from tasks.models import Task
+
+        call_command("seed_orgs", orgs=1, projects=2, tasks=3, comments=1, stdout=StringIO())
+        tasks = Task.objects.count()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            report, _ = self.run_bench(tmp, "run.json")
+            _, output = self.run_bench(tmp, "again.json", baseline=os.path.join(tmp, "run.json"))
+
+        self.assertEqual(report["dataset"]["tasks"], 6)
+        self.assertEqual(set(report["operations"]), set(client_documents()))
+        projects = report["operations"]["getProjectsWithTasks"]
+        self.assertGreaterEqual(projects["latency_ms"]["p99"], projects["latency_ms"]["p50"])
+        self.assertGreater(projects["queries"]["max"], 0)
+        self.assertGreater(projects["memory_kb"]["peak"], 0)
+        self.assertEqual(Task.objects.count(), tasks)
+        self.assertIn("regressions against baseline", output)
+
+
+class PersistedQueryViewTest(TestCase):
+    """test automatic persisted queries and the document cache"""
+
+    QUERY = "query getProjects { projects { id name } }"
+
+    def setUp(self):
+        """set up test data"""
+        from django.core.cache import caches
+        from core.documents import document_cache
+        from orgs.models import Organization
+
+        caches["default"].clear()
+        document_cache.clear()
+        Organization.objects.create(name="Test Organization", slug="test-org", contact_email="t@example.com")
+
+    def extensions(self, query=QUERY):
+        """persisted query extension for query"""
+        from core.documents import document_hash
+
+        return {"persistedQuery": {"version": 1, "sha256Hash": document_hash(query)}}
+
+    def post(self, body):
+        """post body to the graphql endpoint"""
+        return self.client.post(
+            "/graphql/", body, content_type="application/json", headers={"X-ORG-SLUG": "test-org"}
+        )
+
+    def test_registration_flow(self):
+        """test unknown hashes are refused until registered with their query"""
+        missing = self.post({"extensions": self.extensions()}).json()
+        self.assertEqual(missing["errors"][0]["message"], "PersistedQueryNotFound")
+
+        registered = self.post({"query": self.QUERY, "extensions": self.extensions()}).json()
+        self.assertEqual(registered["data"], {"projects": []})
+
+        by_hash = self.post({"extensions": self.extensions()}).json()
+        self.assertEqual(by_hash["data"], {"projects": []})
+
+        response = self.client.get(
+            "/graphql/",
+            {"extensions": json.dumps(self.extensions())},
+            headers={"X-ORG-SLUG": "test-org", "Accept": "application/json"},
+        )
+        self.assertEqual(response.json()["data"], {"projects": []})
+        self.assertIn("X-ORG-SLUG", response["Vary"])
+
+    def test_hash_mismatch_is_rejected(self):
+        """test a query cannot be registered under another query's hash"""
+        result = self.post({"query": "{ projects { id } }", "extensions": self.extensions()}).json()
+        self.assertEqual(result["errors"][0]["message"], "provided sha does not match query")
+
+    def test_documents_are_parsed_once(self):
+        """test repeated documents are served from the cache"""
+        from core.documents import document_cache
+
+        for _ in range(3):
+            self.post({"query": self.QUERY})
+        self.assertEqual((document_cache.hits, document_cache.misses), (2, 1))
+
+    def test_mutation_over_get_is_refused(self):
+        """test cached mutation documents still require POST"""
+        query = 'mutation { createProject(name: "x", status: "ACTIVE") { project { id } } }'
+        self.post({"query": query, "extensions": self.extensions(query)})
+        response = self.client.get(
+            "/graphql/",
+            {"extensions": json.dumps(self.extensions(query))},
+            headers={"X-ORG-SLUG": "test-org", "Accept": "application/json"},
+        )
+        self.assertEqual(response.status_code, 405)
+
+
+class AsyncGraphQLViewTest(TestCase):
+    """test the async view answers like the sync one"""
+
+    def setUp(self):
+        """set up test data"""
+        from orgs.cache import organization_cache
+        from orgs.models import Organization
+        from projects.counters import recompute_task_counters
+        from projects.models import Project
+        from tasks.models import Task, TaskComment
+
+        organization_cache.clear()
+        org = Organization.objects.create(name="Test Organization", slug="test-org", contact_email="t@example.com")
+        self.project = Project.objects.create(organization=org, name="Project", status="ACTIVE")
+        for index in range(3):
+            task = Task.objects.create(project=self.project, title=f"Task {index}", status="TODO")
+            TaskComment.objects.create(task=task, content="hi", author_email="a@example.com")
+        recompute_task_counters(Project.objects.all())
+
+    async def execute(self, path, query, variables=None):
+        """post query to path"""
+        response = await self.async_client.post(
+            path,
+            {"query": query, "variables": variables or {}},
+            content_type="application/json",
+            headers={"X-ORG-SLUG": "test-org"},
+        )
+        return response.json()
+
+    async def test_queries_match_sync_view(self):
+        """test nested, paginated and batched queries resolve the same on both views"""
+        queries = [
+            "{ projects { name tasks { title comments { content } } } }",
+            """query($id: ID!) {
+                tasksConnection(projectId: $id, first: 2) {
+                    totalCount pageInfo { hasNextPage } edges { node { title } }
+                }
+            }""",
+            """query($id: ID!) {
+                projectStatsBatch(projectIds: [$id]) { totalTasks overdueTasks }
+            }""",
+        ]
+        for query in queries:
+            variables = {"id": self.project.id}
+            expected = await self.execute("/graphql/", query, variables)
+            result = await self.execute("/graphql/async/", query, variables)
+            self.assertNotIn("errors", result)
+            self.assertEqual(result, expected)
+
+    async def test_mutation_runs_on_async_view(self):
+        """test transactional mutations run through the async view"""
+        query = """mutation($id: ID!) {
+            createTask(projectId: $id, title: "Async", status: "DONE") { task { title comments { id } } }
+        }"""
+        result = await self.execute("/graphql/async/", query, {"id": self.project.id})
+        self.assertEqual(result["data"]["createTask"]["task"], {"title": "Async", "comments": []})
+
+        await self.project.arefresh_from_db()
+        self.assertEqual((self.project.task_count, self.project.done_task_count), (4, 1))
+
+
+class ResponseCacheTest(TestCase):
+    """test the tenant scoped response cache"""
+
+    TASKS = "query tasks($id: ID!) { tasks(projectId: $id) { title } }"
+
+    def setUp(self):
+        """set up test data"""
+        from django.core.cache import caches
+        from core.responses import response_cache
+        from orgs.models import Organization
+        from projects.models import Project
+
+        caches["default"].clear()
+        response_cache.clear()
+        self.org = Organization.objects.create(name="Test Organization", slug="test-org", contact_email="t@example.com")
+        self.first = Project.objects.create(organization=self.org, name="First", status="ACTIVE")
+        self.second = Project.objects.create(organization=self.org, name="Second", status="ACTIVE")
+
+    def post(self, query, **variables):
+        """post query to the graphql endpoint, running on-commit hooks"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/graphql/",
+                {"query": query, "variables": variables},
+                content_type="application/json",
+                headers={"X-ORG-SLUG": "test-org"},
+            )
+        return response
+
+    def create_task(self, project):
+        """create a task through the mutation"""
+        self.post(
+            'mutation($id: ID!) { createTask(projectId: $id, title: "New", status: "TODO") { task { id } } }',
+            id=project.id,
+        )
+
+    def test_repeated_query_is_served_from_cache(self):
+        """test reformatted documents share an entry and skip execution"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.post(self.TASKS, id=self.first.id)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post("query tasks($id: ID!) {\n  tasks(projectId: $id) {\n    title\n  }\n}", id=self.first.id)
+
+        self.assertEqual(response.json()["data"], {"tasks": []})
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_writes_invalidate_only_touched_entries(self):
+        """test a new task invalidates its project's entries and no others"""
+        from core.responses import response_cache
+
+        self.post(self.TASKS, id=self.first.id)
+        self.post(self.TASKS, id=self.second.id)
+        self.create_task(self.first)
+
+        first = self.post(self.TASKS, id=self.first.id).json()
+        self.assertEqual(first["data"]["tasks"], [{"title": "New"}])
+        hits = response_cache.hits
+        self.post(self.TASKS, id=self.second.id)
+        self.assertEqual(response_cache.hits, hits + 1)
+
+    def test_nested_rows_tag_entries(self):
+        """test entries are invalidated through rows they contain"""
+        from tasks.models import Task
+
+        query = "{ projects { name tasks { title comments { content } } } }"
+        self.create_task(self.first)
+        task_id = Task.objects.get().id
+        self.post(query)
+        self.post(
+            'mutation($id: ID!) { addTaskComment(taskId: $id, content: "Hi", authorEmail: "a@example.com") { comment { id } } }',
+            id=task_id,
+        )
+        projects = self.post(query).json()["data"]["projects"]
+        comments = [c["content"] for p in projects for t in p["tasks"] for c in t["comments"]]
+        self.assertEqual(comments, ["Hi"])
+
+        self.post('mutation { createProject(name: "Third", status: "ACTIVE") { project { id } } }')
+        self.assertEqual(len(self.post(query).json()["data"]["projects"]), 3)
+
+    def test_etag_not_modified(self):
+        """test GET requests revalidate cached responses with ETag"""
+        params = {"query": self.TASKS, "variables": json.dumps({"id": self.first.id})}
+        headers = {"X-ORG-SLUG": "test-org", "Accept": "application/json"}
+        response = self.client.get("/graphql/", params, headers=headers)
+        etag = response["ETag"]
+
+        again = self.client.get("/graphql/", params, headers={**headers, "If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+
+        self.create_task(self.first)
+        changed = self.client.get("/graphql/", params, headers={**headers, "If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_tenant_memory_cap_evicts_least_recently_used(self):
+        """test each tenant is held to its byte budget"""
+        from core.responses import ResponseCache
+
+        cache = ResponseCache(max_bytes_per_tenant=40)
+        cache.put(1, "a", {"v": "x" * 10}, [])
+        cache.put(1, "b", {"v": "y" * 10}, [])
+        cache.get(1, "a")
+        cache.put(1, "c", {"v": "z" * 10}, [])
+        cache.put(2, "a", {"v": "x" * 10}, [])
+
+        self.assertIsNone(cache.get(1, "b"))
+        self.assertEqual(cache.get(1, "a"), {"v": "x" * 10})
+        self.assertEqual(cache.get(2, "a"), {"v": "x" * 10})
+        self.assertLessEqual(cache.stats()["tenants"][1], 40)
+
+
+class QueryCostTest(TestCase):
+    """test static query cost and depth limits"""
+
+    def setUp(self):
+        """set up test data"""
+        from orgs.models import Organization
+
+        Organization.objects.create(name="Test Organization", slug="test-org", contact_email="t@example.com")
+
+    def post(self, query):
+        """post query to the graphql endpoint"""
+        return self.client.post(
+            "/graphql/", {"query": query}, content_type="application/json", headers={"X-ORG-SLUG": "test-org"}
+        ).json()
+
+    def test_cost_is_reported(self):
+        """test list sizes and page sizes multiply the cost of nested selections"""
+        result = self.post("{ projects { name tasks { title comments { content } } } }")
+        self.assertEqual(result["extensions"]["cost"], {"requested": 50 * (1 + 25 * (1 + 5)), "maximum": 10000})
+
+        result = self.post('{ tasksConnection(projectId: 1, first: 10) { edges { node { title } } } }')
+        self.assertEqual(result["extensions"]["cost"]["requested"], 1 + 10 * (1 + 1))
+
+    def test_over_budget_documents_are_rejected_before_execution(self):
+        """test expensive documents fail validation without touching the database"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        query = "{ a: projects { tasks { comments { id } } } b: projects { tasks { comments { id } } } }"
+        self.post("{ projects { id } }")  # warm the organization cache
+        with CaptureQueriesContext(connection) as ctx:
+            result = self.post(query)
+
+        self.assertEqual(result["errors"][0]["extensions"]["code"], "QUERY_TOO_COSTLY")
+        self.assertNotIn("data", result)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+
+@override_settings(PROFILING={"ENABLED": True, "HEADER": "X-GRAPHQL-PROFILE"})
+class ProfilingTest(TestCase):
+    """test per-request profiling and the metrics endpoint"""
+
+    STATS = "query stats($a: ID!, $b: ID!) { a: projectStats(projectId: $a) { totalTasks } b: projectStats(projectId: $b) { totalTasks } }"
+
+    def setUp(self):
+        """set up test data"""
+        from core.profiling import metrics
+        from core.responses import response_cache
+        from orgs.models import Organization
+        from projects.models import Project
+
+        metrics.clear()
+        response_cache.clear()
+        org = Organization.objects.create(name="Test Organization", slug="test-org", contact_email="t@example.com")
+        self.first = Project.objects.create(organization=org, name="First", status="ACTIVE")
+        self.second = Project.objects.create(organization=org, name="Second", status="ACTIVE")
+
+    def post(self, **headers):
+        """post the stats query"""
+        return self.client.post(
+            "/graphql/",
+            {"query": self.STATS, "variables": {"a": self.first.id, "b": self.second.id}},
+            content_type="application/json",
+            headers={"X-ORG-SLUG": "test-org", **headers},
+        ).json()
+
+    def test_trace_is_returned_with_header(self):
+        """test resolver timings and sql per field are reported in apollo tracing format"""
+        result = self.post(**{"X-GRAPHQL-PROFILE": "1"})
+
+        tracing = result["extensions"]["tracing"]
+        self.assertEqual(tracing["version"], 1)
+        paths = [resolver["path"] for resolver in tracing["execution"]["resolvers"]]
+        self.assertIn(["a"], paths)
+        self.assertIn(["b", "totalTasks"], paths)
+
+        sql = result["extensions"]["sql"]
+        self.assertEqual(sql["byField"]["a"]["count"], 1)
+        self.assertEqual(sql["byField"]["b"]["count"], 1)
+        duplicate = next(d for d in sql["duplicates"] if d["fields"] == ["a", "b"])
+        self.assertEqual((duplicate["count"], duplicate["identical"]), (2, 0))
+
+    def test_untraced_requests_feed_metrics(self):
+        """test requests without the header skip tracing but are still measured"""
+        result = self.post()
+        self.assertNotIn("tracing", result["extensions"])
+
+        body = self.client.get("/metrics/").content.decode()
+        self.assertIn('graphql_request_duration_seconds_count{operation="stats"} 1', body)
+        self.assertIn('graphql_request_sql_queries_bucket{operation="stats",le="+Inf"} 1', body)
+
+    def test_metrics_are_hidden_when_disabled(self):
+        """test the endpoint only exists while profiling is enabled"""
+        with self.settings(PROFILING={"ENABLED": False}):
+            self.assertEqual(self.client.get("/metrics/").status_code, 404)
@@ -0,0 +1,79 @@
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models import sql
+
+
+def update_returning(queryset, values, fields):
+    """run queryset.update(**values) as one UPDATE ... RETURNING fields
+
+    returns the updated rows as model instances holding only fields.
+    """
+    model = queryset.model
+    # from_db() expects values in concrete field order
+    wanted = {model._meta.get_field(name).attname for name in fields}
+    columns = [field for field in model._meta.concrete_fields if field.attname in wanted]
+
+    query = queryset.query.chain(sql.UpdateQuery)
+    query.add_update_values(values)
+    query.order_by = ()
+    query.clear_select_clause()
+
+    connection = connections[queryset.db]
+    compiler = query.get_compiler(queryset.db)
+    compiler.pre_sql_setup()
+    statement, params = compiler.as_sql()
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    returning = ", ".join(
+        f"{table}.{connection.ops.quote_name(column.column)}" for column in columns
+    )
+
+    with transaction.mark_for_rollback_on_error(using=queryset.db):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{statement} RETURNING {returning}", params)
+            rows = cursor.fetchall()
+
+    attnames = [column.attname for column in columns]
+    return [model.from_db(queryset.db, attnames, row) for row in rows]
+
+
+def missing_or_conflict(queryset, expected_version):
+    """error for an update that matched no row"""
+    if expected_version is not None and queryset.exists():
+        return Exception(f"Version conflict: expected version {expected_version}")
+    return queryset.model.DoesNotExist(
+        f"{queryset.model._meta.object_name} matching query does not exist."
+    )
+
+
+def write_changes(queryset, changes, returning, expected_version=None):
+    """apply changes with a single UPDATE ... RETURNING, bumping version"""
+    guarded = queryset
+    if expected_version is not None:
+        guarded = queryset.filter(version=expected_version)
+
+    # expression values such as derived columns are written but not returned
+    written = [name for name, value in changes.items() if not hasattr(value, "resolve_expression")]
+    fields = list(dict.fromkeys(["id", "version", *written, *sorted(returning)]))
+    rows = update_returning(guarded, {**changes, "version": F("version") + 1}, fields)
+    if not rows:
+        raise missing_or_conflict(queryset, expected_version)
+    return rows[0]
+
+
+def save_changes(instance, changes, expected_version=None):
+    """save only the fields whose values differ, bumping version
+
+    instance must be locked (select_for_update) by the caller.
+    """
+    if expected_version is not None and instance.version != expected_version:
+        raise Exception(f"Version conflict: expected version {expected_version}")
+
+    changed = [name for name, value in changes.items() if getattr(instance, name) != value]
+    for name in changed:
+        setattr(instance, name, changes[name])
+
+    if changed:
+        instance.version += 1
+        instance.save(update_fields=[*changed, "version"])
+    return changed
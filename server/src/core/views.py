@@ -0,0 +1,348 @@
+import json
+from inspect import isawaitable
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    set_response_etag,
+)
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView as BaseGraphQLView
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast
+
+from core.documents import (
+    document_cache,
+    document_hash,
+    persisted_queries,
+    persisted_query_not_found,
+)
+from core.complexity import cost_settings, operation_cost
+from core.profiling import metrics, profiling_settings
+from core.responses import response_cache
+
+
+class GraphQLView(BaseGraphQLView):
+    """graphql view with persisted queries and a parsed document cache"""
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        return self.finalize_response(request, response)
+
+    def finalize_response(self, request, response):
+        """etag cached query results, vary on the tenant and mark cacheable persisted GETs"""
+        if getattr(request, "response_cacheable", False) and response.status_code == 200:
+            set_response_etag(response)
+            if request.method == "GET":
+                response = get_conditional_response(request, etag=response["ETag"], response=response)
+
+        patch_vary_headers(response, ["X-ORG-SLUG"])
+
+        # hash-only GET requests have stable urls, so let http caches keep them
+        max_age = getattr(settings, "PERSISTED_QUERIES", {}).get("GET_MAX_AGE", 0)
+        if (
+            request.method == "GET"
+            and response.status_code == 200
+            and max_age
+            and self.get_persisted_hash(request, {})
+        ):
+            patch_cache_control(response, private=True, max_age=max_age)
+        return response
+
+    @staticmethod
+    def get_persisted_hash(request, data):
+        """sha256 hash from the persistedQuery extension, if any"""
+        extensions = request.GET.get("extensions") or data.get("extensions") or {}
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+
+        persisted = extensions.get("persistedQuery") if isinstance(extensions, dict) else None
+        if not isinstance(persisted, dict):
+            return None
+        return persisted.get("sha256Hash")
+
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        return self.format_response(request, execution_result, id, show_graphiql)
+
+    def format_response(self, request, execution_result, id=None, show_graphiql=False):
+        """serialize execution_result into (body, status code)"""
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if not execution_result:
+            return None, status_code
+
+        response = {}
+        if execution_result.errors:
+            set_rollback()
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+        if execution_result.errors and any(
+            not getattr(e, "path", None) for e in execution_result.errors
+        ):
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+
+        if execution_result.extensions:
+            response["extensions"] = execution_result.extensions
+
+        if self.batch:
+            response["id"] = id
+            response["status"] = status_code
+
+        return self.json_encode(request, response, pretty=show_graphiql), status_code
+
+    def get_document(self, request, data, query):
+        """resolve, parse and validate the request document through the caches"""
+        sha256_hash = self.get_persisted_hash(request, data)
+        if sha256_hash:
+            if query:
+                persisted_queries.register(sha256_hash, query)
+            else:
+                query = persisted_queries.lookup(sha256_hash)
+                if query is None:
+                    raise persisted_query_not_found()
+        elif not query:
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        return document_cache.load(
+            sha256_hash or document_hash(query),
+            query,
+            self.schema.graphql_schema,
+            self.validation_rules,
+            graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+
+    def prepare_execution(self, request, data, query, variables, operation_name, show_graphiql):
+        """return (cached document, operation_ast, execute_options), or an early result
+
+        the early result is None or an ExecutionResult answering the
+        request without executing it.
+        """
+        if not query and show_graphiql:
+            return None
+
+        try:
+            cached = self.get_document(request, data, query)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        document = cached.document
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if cached.errors:
+            return ExecutionResult(data=None, errors=cached.errors)
+
+        if self.is_cacheable(request, operation_ast, show_graphiql):
+            request.response_cache_key = response_cache.key(cached, operation_name, variables)
+            data = response_cache.get(request.organization.pk, request.response_cache_key)
+            if data is not None:
+                request.response_cacheable = True
+                return ExecutionResult(data=data, extensions=self.result_extensions(request, cached, operation_ast))
+            request.response_cache_tags = set()
+
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+        return cached, operation_ast, execute_options
+
+    def result_extensions(self, request, cached, operation_ast):
+        """response extensions: the operation's static cost and any profile"""
+        if operation_ast is None:
+            return None
+        name = operation_ast.name.value if operation_ast.name else None
+        if name not in cached.costs:
+            cached.costs[name] = operation_cost(self.schema.graphql_schema, cached.document, operation_ast)
+        extensions = {"cost": {"requested": cached.costs[name], "maximum": cost_settings()["MAX_COST"]}}
+
+        profile = getattr(request, "profile", None)
+        if profile is not None:
+            profile.operation_name = name
+            if profile.trace:
+                extensions.update(profile.extensions())
+        return extensions
+
+    def is_cacheable(self, request, operation_ast, show_graphiql):
+        """whether the response to operation_ast may come from the response cache"""
+        return (
+            response_cache.enabled
+            and not self.batch
+            and not show_graphiql
+            and not getattr(getattr(request, "profile", None), "trace", False)
+            and getattr(request, "organization", None) is not None
+            and operation_ast is not None
+            and operation_ast.operation == OperationType.QUERY
+        )
+
+    def store_response(self, request, result):
+        """cache a successful query result under the key prepared for it"""
+        key = getattr(request, "response_cache_key", None)
+        if key is None or result.errors or result.data is None:
+            return
+        response_cache.put(request.organization.pk, key, result.data, request.response_cache_tags)
+        request.response_cacheable = True
+
+    @staticmethod
+    def is_atomic_mutation(operation_ast):
+        """whether operation_ast is a mutation to run in one transaction"""
+        return (
+            operation_ast is not None
+            and operation_ast.operation == OperationType.MUTATION
+            and (
+                graphene_settings.ATOMIC_MUTATIONS is True
+                or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+            )
+        )
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        try:
+            prepared = self.prepare_execution(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+            if not isinstance(prepared, tuple):
+                return prepared
+            cached, operation_ast, execute_options = prepared
+
+            if self.is_atomic_mutation(operation_ast):
+                with transaction.atomic():
+                    result = execute(self.schema.graphql_schema, cached.document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+            else:
+                result = execute(self.schema.graphql_schema, cached.document, **execute_options)
+                self.store_response(request, result)
+            result.extensions = self.result_extensions(request, cached, operation_ast)
+            return result
+        except HttpError:
+            raise
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+
+class AsyncGraphQLView(GraphQLView):
+    """graphql view served on the asgi event loop
+
+    resolvers see info.context.is_async and switch to the async orm api,
+    so concurrent requests do not each hold a worker thread while they
+    wait on the database.
+    """
+    view_is_async = True
+
+    def get_context(self, request):
+        request.is_async = True
+        return super().get_context(request)
+
+    async def dispatch(self, request, *args, **kwargs):
+        response = await self.adispatch(request)
+        return self.finalize_response(request, response)
+
+    async def adispatch(self, request):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                    )
+                )
+
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                # graphiql is a static page, render it the way the sync view does
+                return BaseGraphQLView.dispatch(self, request)
+
+            if self.batch:
+                responses = [await self.aget_response(request, entry) for entry in data]
+                result = "[{}]".format(",".join([response[0] for response in responses]))
+                status_code = (
+                    responses
+                    and max(responses, key=lambda response: response[1])[1]
+                    or 200
+                )
+            else:
+                result, status_code = await self.aget_response(request, data)
+
+            return HttpResponse(status=status_code, content=result, content_type="application/json")
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+
+    async def aget_response(self, request, data):
+        """get_response awaiting the execution result"""
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        execution_result = await self.aexecute_graphql_request(
+            request, data, query, variables, operation_name
+        )
+        return self.format_response(request, execution_result, id)
+
+    async def aexecute_graphql_request(self, request, data, query, variables, operation_name):
+        try:
+            prepared = self.prepare_execution(
+                request, data, query, variables, operation_name, show_graphiql=False
+            )
+            if not isinstance(prepared, tuple):
+                return prepared
+            cached, operation_ast, execute_options = prepared
+
+            if self.is_atomic_mutation(operation_ast):
+                raise Exception("ATOMIC_MUTATIONS is not supported on the async view")
+
+            result = execute(self.schema.graphql_schema, cached.document, **execute_options)
+            if isawaitable(result):
+                result = await result
+            self.store_response(request, result)
+            result.extensions = self.result_extensions(request, cached, operation_ast)
+            return result
+        except HttpError:
+            raise
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+
+def metrics_view(request):
+    """prometheus histograms of profiled graphql requests"""
+    if not profiling_settings()["ENABLED"]:
+        raise Http404
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4")
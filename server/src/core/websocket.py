@@ -0,0 +1,220 @@
+import asyncio
+import json
+from inspect import isawaitable
+
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphene_django.views import instantiate_middleware
+from graphql import (
+    ExecutionResult,
+    GraphQLError,
+    OperationType,
+    execute,
+    get_operation_ast,
+)
+from graphql.execution import create_source_event_stream
+
+from core.documents import document_cache, document_hash
+from orgs.cache import organization_cache
+
+PROTOCOL = "graphql-transport-ws"
+
+
+class SubscriptionContext:
+    """graphql context for operations sent over a websocket"""
+    is_async = True
+
+    def __init__(self, organization, scope):
+        self.organization = organization
+        self.scope = scope
+
+
+class CloseConnection(Exception):
+    """close the socket with a graphql-transport-ws close code"""
+    def __init__(self, code, reason):
+        super().__init__(reason)
+        self.code = code
+        self.reason = reason
+
+
+class GraphQLWebSocket:
+    """asgi application serving graphql over the graphql-transport-ws protocol"""
+    def __init__(self, schema=None, path=None, validation_rules=None):
+        self.schema = schema
+        self.validation_rules = validation_rules
+        self.path = path or getattr(settings, "SUBSCRIPTIONS", {}).get("PATH", "/graphql/")
+
+    async def __call__(self, scope, receive, send):
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+        if scope["path"] != self.path or PROTOCOL not in scope.get("subprotocols", ()):
+            await send({"type": "websocket.close", "code": 4400})
+            return
+
+        await send({"type": "websocket.accept", "subprotocol": PROTOCOL})
+        schema = (self.schema or graphene_settings.SCHEMA).graphql_schema
+        await SubscriptionConnection(schema, scope, send, self.validation_rules).run(receive)
+
+
+class SubscriptionConnection:
+    """state of one graphql-transport-ws connection"""
+    def __init__(self, schema, scope, send, validation_rules=None):
+        self.schema = schema
+        self.validation_rules = validation_rules
+        self.scope = scope
+        self._send = send
+        self.organization = None
+        self.acknowledged = False
+        self.operations = {}
+        self.middleware = list(instantiate_middleware(graphene_settings.MIDDLEWARE))
+
+    async def run(self, receive):
+        """handle messages until either side closes the socket"""
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                try:
+                    await self.handle(json.loads(message.get("text") or "null"))
+                except ValueError:
+                    raise CloseConnection(4400, "Invalid message")
+        except CloseConnection as e:
+            await self._send({"type": "websocket.close", "code": e.code, "reason": e.reason})
+        finally:
+            for task in self.operations.values():
+                task.cancel()
+
+    async def handle(self, message):
+        """dispatch one protocol message"""
+        if not isinstance(message, dict):
+            raise CloseConnection(4400, "Invalid message")
+        kind = message.get("type")
+
+        if kind == "connection_init":
+            await self.init(message.get("payload") or {})
+        elif kind == "ping":
+            await self.send({"type": "pong"})
+        elif kind == "pong":
+            pass
+        elif not self.acknowledged:
+            raise CloseConnection(4401, "Unauthorized")
+        elif kind == "subscribe":
+            await self.subscribe(message.get("id"), message.get("payload") or {})
+        elif kind == "complete":
+            task = self.operations.pop(message.get("id"), None)
+            if task is not None:
+                task.cancel()
+        else:
+            raise CloseConnection(4400, f"Unknown message type: {kind}")
+
+    async def init(self, payload):
+        """resolve the tenant from the init payload or the handshake headers"""
+        if self.acknowledged:
+            raise CloseConnection(4429, "Too many initialisation requests")
+
+        headers = {
+            key.decode().lower(): value.decode()
+            for key, value in self.scope.get("headers", ())
+        }
+        slug = payload.get("X-ORG-SLUG") or headers.get("x-org-slug")
+        self.organization = await organization_cache.aget(slug) if slug else None
+        if self.organization is None:
+            raise CloseConnection(4403, "Forbidden")
+
+        self.acknowledged = True
+        await self.send({"type": "connection_ack"})
+
+    def context(self):
+        return SubscriptionContext(self.organization, self.scope)
+
+    async def subscribe(self, operation_id, payload):
+        """start an operation; subscriptions stream until completed"""
+        if not isinstance(operation_id, str):
+            raise CloseConnection(4400, "Invalid message")
+        if operation_id in self.operations:
+            raise CloseConnection(4409, f"Subscriber for {operation_id} already exists")
+
+        query = payload.get("query")
+        try:
+            if not query:
+                raise GraphQLError("Must provide query string.")
+            cached = document_cache.load(
+                document_hash(query),
+                query,
+                self.schema,
+                self.validation_rules,
+                graphene_settings.MAX_VALIDATION_ERRORS,
+            )
+        except GraphQLError as e:
+            await self.send_errors(operation_id, [e])
+            return
+        if cached.errors:
+            await self.send_errors(operation_id, cached.errors)
+            return
+
+        operation = get_operation_ast(cached.document, payload.get("operationName"))
+        options = {
+            "variable_values": payload.get("variables"),
+            "operation_name": payload.get("operationName"),
+        }
+        if operation is not None and operation.operation == OperationType.SUBSCRIPTION:
+            stream = await create_source_event_stream(
+                self.schema, cached.document, context_value=self.context(), **options
+            )
+            if isinstance(stream, ExecutionResult):
+                await self.send_errors(operation_id, stream.errors)
+                return
+            runner = self.stream(operation_id, stream, cached.document, options)
+        else:
+            runner = self.single(operation_id, cached.document, options)
+        self.operations[operation_id] = asyncio.ensure_future(runner)
+
+    async def stream(self, operation_id, stream, document, options):
+        """execute the document once per event published to stream"""
+        try:
+            async for event in stream:
+                await self.send_result(operation_id, await self.execute(document, options, event))
+            await self.complete(operation_id)
+        finally:
+            await stream.aclose()
+
+    async def single(self, operation_id, document, options):
+        """queries and mutations answer once and complete"""
+        await self.send_result(operation_id, await self.execute(document, options))
+        await self.complete(operation_id)
+
+    async def execute(self, document, options, root_value=None):
+        # each execution gets a fresh context so loaders never serve stale rows
+        result = execute(
+            self.schema,
+            document,
+            root_value=root_value,
+            context_value=self.context(),
+            middleware=self.middleware,
+            **options,
+        )
+        if isawaitable(result):
+            result = await result
+        return result
+
+    async def send_result(self, operation_id, result):
+        payload = {"data": result.data}
+        if result.errors:
+            payload["errors"] = [error.formatted for error in result.errors]
+        await self.send({"id": operation_id, "type": "next", "payload": payload})
+
+    async def send_errors(self, operation_id, errors):
+        await self.send({
+            "id": operation_id,
+            "type": "error",
+            "payload": [error.formatted for error in errors],
+        })
+
+    async def complete(self, operation_id):
+        if self.operations.pop(operation_id, None) is not None:
+            await self.send({"id": operation_id, "type": "complete"})
+
+    async def send(self, message):
+        await self._send({"type": "websocket.send", "text": json.dumps(message, default=str)})
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class OrgsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orgs'
+
+    def ready(self):
+        from orgs import signals  # noqa: F401
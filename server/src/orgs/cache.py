@@ -0,0 +1,128 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from orgs.models import Organization
+
+MISSING = "__missing__"
+
+
+class OrganizationCache:
+    """lru + ttl cache of organization slug -> organization"""
+    key_prefix = "org-slug:"
+
+    def __init__(self, max_size=1024, ttl=300, negative_ttl=30, backend=None, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.backend = backend
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        """build the cache from the ORGANIZATION_CACHE setting"""
+        options = getattr(settings, "ORGANIZATION_CACHE", {})
+        return cls(
+            max_size=options.get("MAX_SIZE", 1024),
+            ttl=options.get("TTL", 300),
+            negative_ttl=options.get("NEGATIVE_TTL", 30),
+            backend=options.get("BACKEND"),
+        )
+
+    @property
+    def shared(self):
+        """django cache used across processes, if configured"""
+        return caches[self.backend] if self.backend else None
+
+    def get(self, slug):
+        """return the organization for slug or None if it does not exist"""
+        found, value = self._lookup(slug)
+        if not found:
+            value = Organization.objects.filter(slug=slug).first() or MISSING
+            self._fill(slug, value)
+        return self._copy(value)
+
+    async def aget(self, slug):
+        """get for async callers; the database lookup uses the async orm"""
+        found, value = await sync_to_async(self._lookup)(slug) if self.shared else self._lookup(slug)
+        if not found:
+            value = await Organization.objects.filter(slug=slug).afirst() or MISSING
+            if self.shared:
+                await sync_to_async(self._fill)(slug, value)
+            else:
+                self._fill(slug, value)
+        return self._copy(value)
+    def invalidate(self, slug=None, pk=None):
+        """drop cached entries for slug and any entry holding organization pk"""
+        with self._lock:
+            stale = [
+                key for key, (_, value) in self._entries.items()
+                if key == slug or (pk is not None and value != MISSING and value.pk == pk)
+            ]
+            for key in stale:
+                del self._entries[key]
+        if self.shared:
+            self.shared.delete_many([self.key_prefix + key for key in {slug, *stale} if key])
+
+    def clear(self):
+        """drop every local entry and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """hit/miss counters and current size"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _lookup(self, slug):
+        """(found, value) from the local entries or the shared cache"""
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(slug)
+                self.hits += 1
+                return True, entry[1]
+
+        value = self.shared.get(self.key_prefix + slug) if self.shared else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        self._store(slug, value)
+        return True, value
+
+    def _fill(self, slug, value):
+        """store a value fetched from the database locally and in the shared cache"""
+        if self.shared:
+            self.shared.set(self.key_prefix + slug, value, self._ttl_for(value))
+        self._store(slug, value)
+
+    def _ttl_for(self, value):
+        return self.negative_ttl if value == MISSING else self.ttl
+
+    def _store(self, slug, value):
+        with self._lock:
+            self._entries[slug] = (self.clock() + self._ttl_for(value), value)
+            self._entries.move_to_end(slug)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _copy(value):
+        # requests get their own instance so they cannot mutate the cache
+        return None if value == MISSING else copy.copy(value)
+
+
+organization_cache = OrganizationCache.from_settings()
@@ -0,0 +1,37 @@
+import gzip
+
+from django.core.management.base import BaseCommand
+
+from orgs.models import Organization
+from orgs.transfer import export_organization
+
+
+def open_stream(path, mode, default):
+    """file at path, gzip compressed for .gz, or default for -"""
+    if path == "-":
+        return default
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Command(BaseCommand):
+    help = "export an organization's projects, tasks and comments as ndjson"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", required=True, help="organization slug to export")
+        parser.add_argument("--output", default="-", help="file to write, .gz to compress, - for stdout")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="rows fetched per cursor round trip")
+
+    def handle(self, *args, **options):
+        org = Organization.objects.get(slug=options["org"])
+        stream = open_stream(options["output"], "w", self.stdout)
+        try:
+            counts = export_organization(org, stream, chunk_size=options["chunk_size"])
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        summary = ", ".join(f"{count} {label}" for label, count in counts.items())
+        # keep stdout clean when the export itself is written there
+        (self.stderr if options["output"] == "-" else self.stdout).write(f"{org.slug}: {summary}")
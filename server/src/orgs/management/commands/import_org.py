@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from orgs.management.commands.export_org import open_stream
+from orgs.transfer import OrganizationImporter
+
+
+class Command(BaseCommand):
+    help = "import an export_org ndjson file as a new organization"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="file to read, .gz if compressed, - for stdin")
+        parser.add_argument("--slug", help="slug for the imported organization, defaults to the exported one")
+        parser.add_argument("--batch-size", type=int, default=5000, help="rows written per batch")
+        parser.add_argument("--no-copy", action="store_true", help="use bulk_create instead of COPY")
+
+    def handle(self, *args, **options):
+        importer = OrganizationImporter(
+            slug=options["slug"],
+            batch_size=options["batch_size"],
+            use_copy=False if options["no_copy"] else None,
+        )
+        stream = open_stream(options["path"], "r", sys.stdin)
+        try:
+            org = importer.run(stream)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        summary = ", ".join(f"{count} {label}" for label, count in importer.counts.items())
+        self.stdout.write(f"{org.slug}: {summary}")
@@ -1,8 +1,18 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from orgs.models import Organization
+from core.seeding import seed_tenant
 
 class Command(BaseCommand):
-    help = "seed initial organizations"
+    help = "seed initial organizations, optionally with generated load data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orgs", type=int, default=0, help="generated organizations to add")
+        parser.add_argument("--projects", type=int, default=10, help="projects per generated organization")
+        parser.add_argument("--tasks", type=int, default=100, help="tasks per project")
+        parser.add_argument("--comments", type=int, default=2, help="comments per task")
+        parser.add_argument("--seed", type=int, default=0, help="random seed for reproducible data")
+        parser.add_argument("--batch-size", type=int, default=10000)
 
     def handle(self, *args, **options):
         orgs = [
@@ -28,3 +38,29 @@ class Command(BaseCommand):
                 slug=org["slug"],
                 defaults=org,
             )
+
+        for i in range(options["orgs"]):
+            slug = f"load-{options['seed']}-{i}"
+            if Organization.objects.filter(slug=slug).exists():
+                self.stdout.write(f"{slug}: already seeded")
+                continue
+
+            with transaction.atomic():
+                org = Organization.objects.create(
+                    name=f"Load Test {options['seed']}-{i}",
+                    slug=slug,
+                    contact_email=f"load@{slug}.example.com",
+                )
+                seed_tenant(
+                    org,
+                    options["projects"],
+                    options["tasks"],
+                    options["comments"],
+                    batch_size=options["batch_size"],
+                    seed=options["seed"] * 100003 + i,
+                )
+            self.stdout.write(
+                f"{slug}: {options['projects']} projects, "
+                f"{options['projects'] * options['tasks']} tasks, "
+                f"{options['projects'] * options['tasks'] * options['comments']} comments"
+            )
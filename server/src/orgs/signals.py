@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from orgs.cache import organization_cache
+from orgs.models import Organization
+
+
+@receiver(pre_save, sender=Organization)
+def invalidate_previous_slug(sender, instance, **kwargs):
+    """drop the cached entry for a slug that is about to change"""
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+        if previous and previous != instance.slug:
+            organization_cache.invalidate(slug=previous)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_organization(sender, instance, **kwargs):
+    """drop cached entries for a saved or deleted organization"""
+    organization_cache.invalidate(slug=instance.slug, pk=instance.pk)
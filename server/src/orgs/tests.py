@@ -1,4 +1,10 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
 from django.test import TestCase
 from orgs.models import Organization
 
@@ -35,3 +41,120 @@ class OrganizationModelTest(TestCase):
         self.assertEqual(orgs[0].name, "Another Org")
         self.assertEqual(orgs[1].name, "Test Organization")
 
+
+
+class OrganizationCacheTest(TestCase):
+    """test slug -> organization cache"""
+
+    def setUp(self):
+        """set up test data"""
+        from orgs.cache import OrganizationCache
+
+        self.now = 0
+        self.cache = OrganizationCache(max_size=2, ttl=60, negative_ttl=5, clock=lambda: self.now)
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+
+    def test_hit_after_first_lookup(self):
+        """test second lookup is served without a query"""
+        self.assertEqual(self.cache.get("test-org"), self.org)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get("test-org"), self.org)
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    def test_negative_lookup_is_cached_briefly(self):
+        """test unknown slugs are cached for the negative ttl"""
+        self.assertIsNone(self.cache.get("missing"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.cache.get("missing"))
+
+        self.now = 6
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.cache.get("missing"))
+
+    def test_lru_eviction(self):
+        """test least recently used slug is evicted past max size"""
+        self.cache.get("test-org")
+        self.cache.get("a")
+        self.cache.get("b")
+        with self.assertNumQueries(1):
+            self.cache.get("test-org")
+
+    def test_signals_invalidate_shared_cache(self):
+        """test saving and deleting an organization invalidates the cache"""
+        from orgs.cache import organization_cache
+
+        organization_cache.clear()
+        organization_cache.get("test-org")
+
+        self.org.slug = "renamed"
+        self.org.save()
+        self.assertIsNone(organization_cache.get("test-org"))
+        self.assertEqual(organization_cache.get("renamed").name, "Test Organization")
+
+        self.org.delete()
+        self.assertIsNone(organization_cache.get("renamed"))
+
+
+class OrganizationTransferTest(TestCase):
+    """test export_org and import_org"""
+
+    def setUp(self):
+        """set up test data"""
+        from core.seeding import seed_tenant
+
+        self.org = Organization.objects.create(
+            name="Source", slug="source", contact_email="source@example.com",
+        )
+        seed_tenant(self.org, projects=2, tasks=3, comments=2)
+
+    def export(self, org):
+        """exported ndjson records of org"""
+        stdout = StringIO()
+        call_command("export_org", org=org.slug, stdout=stdout, stderr=StringIO())
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def import_as(self, slug, **options):
+        """export the source organization to a file and import it as slug"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "org.ndjson.gz")
+            call_command("export_org", org="source", output=path, stdout=StringIO())
+            call_command("import_org", path, slug=slug, batch_size=4, stdout=StringIO(), **options)
+        return Organization.objects.get(slug=slug)
+
+    def assert_round_trip(self, **options):
+        from tasks.models import TaskComment
+
+        exported = self.export(self.org)
+        copy = self.import_as("copy", **options)
+        imported = self.export(copy)
+
+        self.assertEqual(len(imported), 1 + 2 + 6 + 12)
+        for before, after in zip(exported, imported):
+            self.assertEqual(before["model"], after["model"])
+            self.assertNotEqual(before["pk"], after["pk"])
+            fields = {k: v for k, v in before["fields"].items() if not k.endswith("_id") and k != "slug"}
+            self.assertEqual(fields, {k: after["fields"][k] for k in fields})
+
+        # foreign keys point at the copied rows, not the originals
+        comment = TaskComment.objects.filter(task__project__organization=copy).first()
+        self.assertEqual(comment.task.project.organization, copy)
+
+    def test_round_trip_with_copy(self):
+        """test an export imports through COPY under new ids"""
+        self.assert_round_trip()
+
+    def test_round_trip_with_bulk_create(self):
+        """test the bulk_create fallback keeps exported timestamps"""
+        self.assert_round_trip(no_copy=True)
+
+    def test_existing_slug_is_rejected(self):
+        """test importing over an existing organization fails without writing"""
+        from projects.models import Project
+
+        with self.assertRaises(Exception):
+            self.import_as("source")
+        self.assertEqual(Project.objects.count(), 2)
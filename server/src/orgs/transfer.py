@@ -0,0 +1,201 @@
+import json
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from orgs.models import Organization
+from projects.models import Project
+from tasks.models import Task, TaskComment
+
+# exported in this order so every row's parent is imported before it
+TRANSFER_MODELS = [
+    (Project, "organization_id", Organization),
+    (Task, "project_id", Project),
+    (TaskComment, "task_id", Task),
+]
+PARENTS = {model: (attname, parent) for model, attname, parent in TRANSFER_MODELS}
+
+
+def transfer_fields(model):
+    """concrete, writable fields copied between databases, without the pk"""
+    return [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key and not getattr(field, "generated", False)
+    ]
+
+
+def tenant_querysets(org):
+    """model -> queryset of the rows owned by org"""
+    return {
+        Project: Project.objects.filter(organization=org),
+        Task: Task.objects.filter(project__organization=org),
+        TaskComment: TaskComment.objects.filter(task__project__organization=org),
+    }
+
+
+def record(model, pk, fields):
+    """one ndjson line"""
+    return json.dumps(
+        {"model": model._meta.label_lower, "pk": pk, "fields": fields},
+        cls=DjangoJSONEncoder,
+    ) + "\n"
+
+
+def export_organization(org, stream, chunk_size=2000):
+    """write org and its projects, tasks and comments to stream as ndjson
+
+    rows are read through server-side cursors, so memory stays constant
+    whatever the size of the tenant. returns model label -> rows written.
+    """
+    fields = {field.attname: getattr(org, field.attname) for field in transfer_fields(Organization)}
+    stream.write(record(Organization, org.pk, fields))
+
+    counts = {}
+    querysets = tenant_querysets(org)
+    for model, _, _ in TRANSFER_MODELS:
+        attnames = [field.attname for field in transfer_fields(model)]
+        rows = querysets[model].order_by("pk").values_list("pk", *attnames)
+        count = 0
+        for pk, *values in rows.iterator(chunk_size=chunk_size):
+            stream.write(record(model, pk, dict(zip(attnames, values))))
+            count += 1
+        counts[model._meta.label_lower] = count
+    return counts
+
+
+class OrganizationImporter:
+    """load an export_organization stream as a new organization
+
+    ids are remapped: every row gets a fresh primary key and foreign keys
+    point at the new parents. rows are written in batches of batch_size,
+    with COPY on postgres and bulk_create elsewhere.
+    """
+    def __init__(self, slug=None, batch_size=5000, use_copy=None):
+        self.slug = slug
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == "postgresql" if use_copy is None else use_copy
+        self.organization = None
+        self.counts = {}
+        # old pk -> new pk for every model that has children
+        self.ids = {parent: {} for _, _, parent in TRANSFER_MODELS}
+
+    def run(self, lines):
+        """import every line in one transaction and return the organization"""
+        with transaction.atomic():
+            model, batch = None, []
+            for line in lines:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                try:
+                    next_model = apps.get_model(data["model"])
+                except LookupError:
+                    raise Exception(f"Unknown model in export: {data['model']}")
+
+                if next_model is Organization:
+                    self.create_organization(data)
+                    continue
+                if self.organization is None:
+                    raise Exception("Export must start with the organization")
+                if next_model not in PARENTS:
+                    raise Exception(f"Cannot import {data['model']}")
+
+                if next_model is not model or len(batch) >= self.batch_size:
+                    self.flush(model, batch)
+                    model, batch = next_model, []
+                batch.append(data)
+            self.flush(model, batch)
+
+        if self.organization is None:
+            raise Exception("Export does not contain an organization")
+        return self.organization
+
+    def create_organization(self, data):
+        if self.organization is not None:
+            raise Exception("Export contains more than one organization")
+        fields = dict(data["fields"])
+        if self.slug:
+            fields["slug"] = self.slug
+        if Organization.objects.filter(slug=fields["slug"]).exists():
+            raise Exception(f"Organization {fields['slug']} already exists")
+
+        created_at = fields.pop("created_at", None)
+        self.organization = Organization.objects.create(**fields)
+        if created_at:
+            # auto_now_add overrode the exported timestamp on create
+            Organization.objects.filter(pk=self.organization.pk).update(created_at=created_at)
+        self.ids[Organization][data["pk"]] = self.organization.pk
+
+    def flush(self, model, batch):
+        """write one batch of rows of model"""
+        if not batch:
+            return
+        attname, parent = PARENTS[model]
+        parent_ids = self.ids[parent]
+        rows = []
+        for data in batch:
+            values = dict(data["fields"])
+            try:
+                values[attname] = parent_ids[values[attname]]
+            except KeyError:
+                raise Exception(f"{data['model']} {data['pk']} references a missing {parent._meta.label_lower}")
+            rows.append(values)
+
+        if self.use_copy:
+            new_ids = self.copy(model, rows)
+        else:
+            new_ids = self.bulk_create(model, rows)
+
+        if model in self.ids:
+            self.ids[model].update(zip((data["pk"] for data in batch), new_ids))
+        label = model._meta.label_lower
+        self.counts[label] = self.counts.get(label, 0) + len(rows)
+
+    @staticmethod
+    def copy(model, rows):
+        """COPY rows into model's table under primary keys taken from its sequence"""
+        fields = transfer_fields(model)
+        pk = model._meta.pk
+        columns = ", ".join(connection.ops.quote_name(f.column) for f in [pk, *fields])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                [model._meta.db_table, pk.column, len(rows)],
+            )
+            new_ids = [row[0] for row in cursor.fetchall()]
+            table = connection.ops.quote_name(model._meta.db_table)
+            with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                for new_id, values in zip(new_ids, rows):
+                    copy.write_row([new_id, *(values[f.attname] for f in fields)])
+        return new_ids
+
+    @staticmethod
+    def bulk_create(model, rows):
+        """bulk_create rows and return their new primary keys"""
+        fields = transfer_fields(model)
+        objs = [
+            model(**{f.attname: f.to_python(values[f.attname]) for f in fields})
+            for values in rows
+        ]
+        with exported_timestamps(model):
+            model.objects.bulk_create(objs)
+        return [obj.pk for obj in objs]
+
+
+@contextmanager
+def exported_timestamps(model):
+    """stop auto_now_add from overwriting exported timestamps in bulk_create
+
+    this patches the model's fields for the whole process, which is fine
+    for the single-threaded import command this is used by.
+    """
+    stamped = [f for f in model._meta.concrete_fields if getattr(f, "auto_now_add", False)]
+    for field in stamped:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in stamped:
+            field.auto_now_add = True
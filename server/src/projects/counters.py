@@ -0,0 +1,78 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from projects.models import Project
+
+STATUS_COUNTER_FIELDS = {
+    "TODO": "todo_task_count",
+    "IN_PROGRESS": "in_progress_task_count",
+    "DONE": "done_task_count",
+}
+
+
+def counter_field(status):
+    """project counter column for a task status"""
+    try:
+        return STATUS_COUNTER_FIELDS[status]
+    except KeyError:
+        raise Exception(f"Invalid task status: {status}")
+
+
+def apply_task_counter_deltas(project_id, deltas):
+    """add status -> delta changes to a project's counters in one update"""
+    # clamp at zero so drifted counters never fail a write; the
+    # recompute_task_counters command repairs them
+    changes = {}
+    for status, delta in deltas.items():
+        if delta:
+            field = counter_field(status)
+            changes[field] = Greatest(F(field) + delta, Value(0))
+
+    total = sum(deltas.values())
+    if total:
+        changes["task_count"] = Greatest(F("task_count") + total, Value(0))
+
+    if changes:
+        Project.objects.filter(pk=project_id).update(**changes)
+
+
+def task_created(project_id, status):
+    """count a new task"""
+    apply_task_counter_deltas(project_id, {status: 1})
+
+
+def task_deleted(project_id, status):
+    """uncount a deleted task"""
+    apply_task_counter_deltas(project_id, {status: -1})
+
+
+def task_status_changed(project_id, old_status, new_status):
+    """move a task between status counters"""
+    if old_status != new_status:
+        apply_task_counter_deltas(project_id, {old_status: -1, new_status: 1})
+
+
+def counter_subqueries(task_model):
+    """subquery expressions recounting each counter from task rows"""
+    def count(**filters):
+        counts = (
+            task_model.objects.filter(project=OuterRef("pk"), **filters)
+            .order_by()
+            .values("project")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    values = {"task_count": count()}
+    for status, field in STATUS_COUNTER_FIELDS.items():
+        values[field] = count(status=status)
+    return values
+
+
+def recompute_task_counters(projects, task_model=None):
+    """recount counters for a project queryset with one update statement"""
+    if task_model is None:
+        from tasks.models import Task as task_model
+
+    return projects.update(**counter_subqueries(task_model))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.counters import recompute_task_counters
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = "recompute denormalized task counters on projects"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", help="only recompute projects of this organization slug")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by("pk")
+        if options["org"]:
+            projects = projects.filter(organization__slug=options["org"])
+
+        batch_size = options["batch_size"]
+        last_pk = 0
+        updated = 0
+        while True:
+            ids = list(
+                projects.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                updated += recompute_task_counters(Project.objects.filter(pk__in=ids))
+            last_pk = ids[-1]
+
+        self.stdout.write(f"recomputed task counters for {updated} projects")
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-18 07:55
+
+from django.db import migrations, models
+
+
+def backfill_task_counters(apps, schema_editor):
+    from projects.counters import recompute_task_counters
+
+    Project = apps.get_model("projects", "Project")
+    Task = apps.get_model("tasks", "Task")
+    recompute_task_counters(Project.objects.all(), task_model=Task)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='done_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='in_progress_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='todo_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_task_counters, migrations.RunPython.noop),
+    ]
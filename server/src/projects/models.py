@@ -20,6 +20,14 @@ class Project(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
     due_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # bumped on every update, used for optimistic concurrency checks
+    version = models.PositiveIntegerField(default=0)
+
+    # denormalized task counters, maintained by projects.counters
+    task_count = models.PositiveIntegerField(default=0)
+    todo_task_count = models.PositiveIntegerField(default=0)
+    in_progress_task_count = models.PositiveIntegerField(default=0)
+    done_task_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ("organization", "name")
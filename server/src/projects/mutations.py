@@ -1,4 +1,9 @@
 import graphene
+from django.db import transaction
+from core.execution import in_thread
+from core.optimizer import selected_columns
+from core.responses import instance_tag, response_cache
+from core.updates import save_changes, write_changes
 from projects.models import Project
 from projects.schema import ProjectType
 
@@ -13,6 +18,7 @@ class CreateProject(graphene.Mutation):
         status = graphene.String(required=True)
         due_date = graphene.Date()
 
+    @in_thread
     def mutate(self, info, name, status, description="", due_date=None):
         """create project for the current organization"""
         org = info.context.organization
@@ -26,6 +32,8 @@ class CreateProject(graphene.Mutation):
             status=status,
             due_date=due_date,
         )
+        # lists of the organization's projects now have one more row
+        response_cache.invalidate_on_commit([instance_tag(type(org), org.pk)])
         return CreateProject(project=project)
 
 
@@ -39,18 +47,27 @@ class UpdateProject(graphene.Mutation):
         description = graphene.String()
         status = graphene.String()
         due_date = graphene.Date()
+        expected_version = graphene.Int()
 
-    def mutate(self, info, project_id, **kwargs):
-        """update project fields"""
+    @in_thread
+    def mutate(self, info, project_id, expected_version=None, **kwargs):
+        """update only the provided project fields"""
         org = info.context.organization
-        project = Project.objects.get(
+        changes = {key: value for key, value in kwargs.items() if value is not None}
+
+        queryset = Project.objects.filter(
             id=project_id,
             organization=org,
         )
 
-        for key, value in kwargs.items():
-            if value is not None:
-                setattr(project, key, value)
+        returning = selected_columns(info, Project, "project")
+        if changes and returning is not None:
+            project = write_changes(queryset, changes, returning, expected_version)
+            response_cache.invalidate_on_commit([instance_tag(Project, project.pk)])
+            return UpdateProject(project=project)
 
-        project.save()
-        return UpdateProject(project=project)
\ No newline at end of file
+        with transaction.atomic():
+            project = queryset.select_for_update().get()
+            save_changes(project, changes, expected_version)
+            response_cache.invalidate_on_commit([instance_tag(Project, project.pk)])
+        return UpdateProject(project=project)
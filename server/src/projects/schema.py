@@ -1,6 +1,12 @@
 import graphene
 from graphene_django import DjangoObjectType
+from core.dataloader import get_loaders, load_related
+from core.execution import with_async
+from projects.counters import STATUS_COUNTER_FIELDS
 from projects.models import Project
+from projects.stats import overdue_task_counts
+
+COUNTER_COLUMNS = ["id", "task_count", *STATUS_COUNTER_FIELDS.values()]
 
 
 class ProjectType(DjangoObjectType):
@@ -14,15 +20,58 @@ class ProjectType(DjangoObjectType):
             "status",
             "due_date",
             "created_at",
+            "version",
             "tasks",
         )
 
+    def resolve_tasks(self, info):
+        """resolve tasks for all projects in the request with one query"""
+        return load_related(info, self, "tasks")
+
+
+class TaskStatusCountType(graphene.ObjectType):
+    """graphql type for the number of tasks in one status"""
+    status = graphene.String()
+    count = graphene.Int()
+
 
 class ProjectStatsType(graphene.ObjectType):
     """graphql type for project statistics"""
+    project_id = graphene.ID()
     total_tasks = graphene.Int()
     completed_tasks = graphene.Int()
     completion_rate = graphene.Float()
+    todo_tasks = graphene.Int()
+    in_progress_tasks = graphene.Int()
+    overdue_tasks = graphene.Int()
+    status_counts = graphene.List(TaskStatusCountType)
+
+    @classmethod
+    def from_project(cls, project):
+        """build stats from the denormalized counters of project"""
+        total = project.task_count
+        completed = project.done_task_count
+        return cls(
+            project_id=project.id,
+            total_tasks=total,
+            completed_tasks=completed,
+            completion_rate=(completed / total * 100) if total else 0,
+            todo_tasks=project.todo_task_count,
+            in_progress_tasks=project.in_progress_task_count,
+            status_counts=[
+                TaskStatusCountType(status=status, count=getattr(project, field))
+                for status, field in STATUS_COUNTER_FIELDS.items()
+            ],
+        )
+
+    def resolve_overdue_tasks(self, info):
+        """resolve overdue tasks, batched across every stats object"""
+        return overdue_loader(info).load_for(info, int(self.project_id))
+
+
+def overdue_loader(info):
+    """loader of overdue task counts keyed by project id"""
+    return get_loaders(info).loader("overdue_tasks", overdue_task_counts, default=int)
 
 
 class Query(graphene.ObjectType):
@@ -32,6 +81,10 @@ class Query(graphene.ObjectType):
         ProjectStatsType,
         project_id=graphene.ID(required=True),
     )
+    project_stats_batch = graphene.List(
+        ProjectStatsType,
+        project_ids=graphene.List(graphene.NonNull(graphene.ID), required=True),
+    )
 
     def resolve_projects(self, info):
         """resolve all projects for the current organization"""
@@ -41,22 +94,41 @@ class Query(graphene.ObjectType):
 
         return Project.objects.filter(organization=org)
 
+    async def aresolve_project_stats(self, info, project_id):
+        org = info.context.organization
+        project = await stats_queryset(org, [project_id]).afirst()
+        return ProjectStatsType.from_project(project or Project(id=project_id))
+
+    @with_async(aresolve_project_stats)
     def resolve_project_stats(self, info, project_id):
         """resolve project statistics"""
         org = info.context.organization
+        project = stats_queryset(org, [project_id]).first()
+        return ProjectStatsType.from_project(project or Project(id=project_id))
 
-        from tasks.models import Task
+    async def aresolve_project_stats_batch(self, info, project_ids):
+        org = info.context.organization
+        projects = {p.pk: p async for p in stats_queryset(org, project_ids)}
+        return stats_in_order(info, projects, project_ids)
 
-        qs = Task.objects.filter(
-            project_id=project_id,
-            project__organization=org,
-        )
+    @with_async(aresolve_project_stats_batch)
+    def resolve_project_stats_batch(self, info, project_ids):
+        """resolve statistics for many projects with one grouped query"""
+        org = info.context.organization
+        projects = stats_queryset(org, project_ids).in_bulk()
+        return stats_in_order(info, projects, project_ids)
 
-        total = qs.count()
-        completed = qs.filter(status="DONE").count()
 
-        return ProjectStatsType(
-            total_tasks=total,
-            completed_tasks=completed,
-            completion_rate=(completed / total * 100) if total else 0,
-        )
+def stats_queryset(org, project_ids):
+    """counter columns of the organization's projects among project_ids"""
+    return Project.objects.filter(
+        id__in=project_ids,
+        organization=org,
+    ).only(*COUNTER_COLUMNS)
+
+
+def stats_in_order(info, projects, project_ids):
+    """stats for the found projects in requested order, priming overdue counts"""
+    ids = [pk for pk in dict.fromkeys(int(pk) for pk in project_ids) if pk in projects]
+    overdue_loader(info).prime(ids)
+    return [ProjectStatsType.from_project(projects[pk]) for pk in ids]
@@ -0,0 +1,16 @@
+from django.db.models import Count
+from django.utils import timezone
+
+
+def overdue_task_counts(project_ids):
+    """open tasks past their due date, grouped by project"""
+    from tasks.models import Task
+
+    rows = (
+        Task.objects.filter(project_id__in=project_ids, due_date__lt=timezone.now())
+        .exclude(status="DONE")
+        .order_by()
+        .values("project_id")
+        .annotate(count=Count("pk"))
+    )
+    return {row["project_id"]: row["count"] for row in rows}
@@ -1,6 +1,8 @@
 import pytest
+from io import StringIO
 from django.test import TestCase
 from orgs.models import Organization
+from projects.counters import recompute_task_counters
 from projects.models import Project
 
 
@@ -52,3 +54,283 @@ class ProjectModelTest(TestCase):
         self.assertEqual(projects[0].name, "Newer Project")
         self.assertEqual(projects[1].name, "Test Project")
 
+
+
+class ProjectsWithTasksQueryTest(TestCase):
+    """test nested project tasks are batched"""
+
+    QUERY = """
+        query getProjectsWithTasks {
+            projects {
+                id
+                name
+                tasks {
+                    id
+                    title
+                    comments { id content }
+                }
+            }
+        }
+    """
+
+    def setUp(self):
+        """set up test data"""
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+
+    def seed(self, projects, tasks):
+        """create projects with tasks and one comment per task"""
+        from tasks.models import Task, TaskComment
+
+        for i in range(projects):
+            project = Project.objects.create(
+                organization=self.org,
+                name=f"Project {i}-{Project.objects.count()}",
+                status="ACTIVE",
+            )
+            for j in range(tasks):
+                task = Task.objects.create(
+                    project=project,
+                    title=f"Task {j}",
+                    status="TODO",
+                )
+                TaskComment.objects.create(
+                    task=task,
+                    content=f"Comment {j}",
+                    author_email="author@example.com",
+                )
+
+    def execute(self):
+        """run the query uncached and return its queries and data"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.responses import response_cache
+
+        response_cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/graphql/",
+                {"query": self.QUERY},
+                content_type="application/json",
+                headers={"X-ORG-SLUG": "test-org"},
+            )
+        return len(ctx.captured_queries), response.json()
+
+    def test_query_count_is_constant(self):
+        """test query count does not grow with projects and tasks"""
+        self.seed(projects=2, tasks=2)
+        self.execute()  # warm the organization cache
+        small_count, small = self.execute()
+
+        self.seed(projects=8, tasks=5)
+        large_count, large = self.execute()
+
+        self.assertNotIn("errors", large)
+        self.assertEqual(len(large["data"]["projects"]), 10)
+        self.assertEqual(small_count, large_count)
+
+    def test_tasks_keep_model_ordering(self):
+        """test batched tasks keep newest first and comments oldest first"""
+        self.seed(projects=1, tasks=3)
+        _, result = self.execute()
+
+        tasks = result["data"]["projects"][0]["tasks"]
+        self.assertEqual([t["title"] for t in tasks], ["Task 2", "Task 1", "Task 0"])
+        self.assertEqual(tasks[0]["comments"][0]["content"], "Comment 2")
+
+    def test_only_selected_columns_are_fetched(self):
+        """test unselected text columns are left out of the sql"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.seed(projects=1, tasks=1)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/graphql/",
+                {"query": "{ projects { id name tasks { id title } } }"},
+                content_type="application/json",
+                headers={"X-ORG-SLUG": "test-org"},
+            )
+
+        self.assertNotIn("errors", response.json())
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertIn('"tasks_task"."title"', sql)
+        self.assertNotIn('"description"', sql)
+
+
+class ProjectStatsQueryTest(TestCase):
+    """test project statistics queries"""
+
+    def setUp(self):
+        """set up test data"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from tasks.models import Task
+
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+        self.project = Project.objects.create(
+            organization=self.org,
+            name="Test Project",
+            status="ACTIVE",
+        )
+        self.empty = Project.objects.create(
+            organization=self.org,
+            name="Empty Project",
+            status="ACTIVE",
+        )
+        other_org = Organization.objects.create(
+            name="Other Organization",
+            slug="other-org",
+            contact_email="other@example.com",
+        )
+        self.other = Project.objects.create(
+            organization=other_org,
+            name="Other Project",
+            status="ACTIVE",
+        )
+        yesterday = timezone.now() - timedelta(days=1)
+        for status, due_date in [
+            ("TODO", yesterday),
+            ("TODO", None),
+            ("IN_PROGRESS", None),
+            ("DONE", yesterday),
+        ]:
+            Task.objects.create(
+                project=self.project,
+                title=status,
+                status=status,
+                due_date=due_date,
+            )
+        recompute_task_counters(Project.objects.all())
+
+    def execute(self, query):
+        """run query for the test organization"""
+        response = self.client.post(
+            "/graphql/",
+            {"query": query},
+            content_type="application/json",
+            headers={"X-ORG-SLUG": "test-org"},
+        )
+        return response.json()
+
+    def test_project_stats_counts(self):
+        """test stats count every status and overdue tasks"""
+        self.execute("{ projects { id } }")  # warm the organization cache
+        with self.assertNumQueries(2):
+            result = self.execute(
+                "{ projectStats(projectId: %d) { totalTasks completedTasks completionRate"
+                " todoTasks inProgressTasks overdueTasks statusCounts { status count } } }"
+                % self.project.id
+            )
+
+        stats = result["data"]["projectStats"]
+        self.assertEqual(stats["totalTasks"], 4)
+        self.assertEqual(stats["completedTasks"], 1)
+        self.assertEqual(stats["completionRate"], 25.0)
+        self.assertEqual(stats["todoTasks"], 2)
+        self.assertEqual(stats["inProgressTasks"], 1)
+        self.assertEqual(stats["overdueTasks"], 1)
+        self.assertEqual(
+            stats["statusCounts"],
+            [
+                {"status": "TODO", "count": 2},
+                {"status": "IN_PROGRESS", "count": 1},
+                {"status": "DONE", "count": 1},
+            ],
+        )
+
+    def test_project_stats_reads_counters(self):
+        """test counter based stats need no aggregate over tasks"""
+        self.execute("{ projects { id } }")  # warm the organization cache
+        with self.assertNumQueries(1):
+            result = self.execute(
+                "{ projectStats(projectId: %d) { totalTasks completedTasks } }"
+                % self.project.id
+            )
+
+        self.assertEqual(
+            result["data"]["projectStats"],
+            {"totalTasks": 4, "completedTasks": 1},
+        )
+
+    def test_project_stats_batch(self):
+        """test batch stats skip projects of other organizations"""
+        result = self.execute(
+            "{ projectStatsBatch(projectIds: [%d, %d, %d]) { projectId totalTasks overdueTasks } }"
+            % (self.project.id, self.empty.id, self.other.id)
+        )
+
+        self.assertEqual(
+            result["data"]["projectStatsBatch"],
+            [
+                {"projectId": str(self.project.id), "totalTasks": 4, "overdueTasks": 1},
+                {"projectId": str(self.empty.id), "totalTasks": 0, "overdueTasks": 0},
+            ],
+        )
+
+    def test_recompute_command_repairs_counters(self):
+        """test the management command recounts drifted counters"""
+        from django.core.management import call_command
+
+        Project.objects.filter(pk=self.project.pk).update(task_count=99, todo_task_count=0)
+        call_command("recompute_task_counters", org="test-org", stdout=StringIO())
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 4)
+        self.assertEqual(self.project.todo_task_count, 2)
+
+
+class UpdateProjectMutationTest(TestCase):
+    """test partial project updates"""
+
+    def setUp(self):
+        """set up test data"""
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+        self.project = Project.objects.create(
+            organization=self.org,
+            name="Test Project",
+            description="Kept",
+            status="ACTIVE",
+        )
+
+    def execute(self, selection, **variables):
+        """run updateProject for the test organization"""
+        response = self.client.post(
+            "/graphql/",
+            {
+                "query": "mutation($id: ID!, $name: String, $v: Int) {"
+                " updateProject(projectId: $id, name: $name, expectedVersion: $v)"
+                " { project { %s } } }" % selection,
+                "variables": {"id": self.project.id, **variables},
+            },
+            content_type="application/json",
+            headers={"X-ORG-SLUG": "test-org"},
+        )
+        return response.json()
+
+    def test_update_returns_new_values(self):
+        """test both update paths only touch the given fields"""
+        fast = self.execute("name version", name="Renamed")
+        self.assertEqual(fast["data"]["updateProject"]["project"], {"name": "Renamed", "version": 1})
+
+        slow = self.execute("name version tasks { id }", name="Again", v=1)
+        self.assertEqual(slow["data"]["updateProject"]["project"]["version"], 2)
+
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.name, self.project.description), ("Again", "Kept"))
+
+    def test_version_conflict(self):
+        """test a stale expected version is rejected"""
+        result = self.execute("name", name="Renamed", v=5)
+        self.assertIn("Version conflict", result["errors"][0]["message"])
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-18 08:25
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def backfill_search_vectors(apps, schema_editor):
+    from tasks.search import refresh_search_vectors
+
+    Task = apps.get_model("tasks", "Task")
+    TaskComment = apps.get_model("tasks", "TaskComment")
+    refresh_search_vectors(Task.objects.all(), comment_model=TaskComment)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_project_version'),
+        ('tasks', '0003_task_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # backfill before indexing so the gin index is built in one pass
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ),
+    ]
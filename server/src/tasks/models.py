@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from projects.models import Project
 
@@ -21,9 +23,29 @@ class Task(models.Model):
     assignee_email = models.EmailField(blank=True)
     due_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # bumped on every update, used for optimistic concurrency checks
+    version = models.PositiveIntegerField(default=0)
+    # title, description and comment text, maintained by tasks.search
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["project", "created_at", "id"],
+                name="task_project_created_idx",
+            ),
+            models.Index(
+                fields=["project", "status"],
+                name="task_project_status_idx",
+            ),
+            models.Index(
+                fields=["project", "due_date"],
+                name="task_open_due_date_idx",
+                condition=models.Q(due_date__isnull=False) & ~models.Q(status="DONE"),
+            ),
+            GinIndex(fields=["search_vector"], name="task_search_vector_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -42,3 +64,9 @@ class TaskComment(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["task", "created_at", "id"],
+                name="comment_task_created_idx",
+            ),
+        ]
@@ -1,7 +1,42 @@
+from collections import defaultdict
+
 import graphene
+from django.conf import settings
+from django.db import transaction
 from tasks.models import Task, TaskComment
+from projects.counters import (
+    STATUS_COUNTER_FIELDS,
+    apply_task_counter_deltas,
+    counter_field,
+    task_created,
+    task_status_changed,
+)
 from projects.models import Project
+from core.execution import in_thread
+from core.optimizer import selected_columns
+from core.responses import instance_tag, response_cache
+from core.updates import save_changes, write_changes
 from tasks.schema import TaskType, TaskCommentType
+from tasks.search import refresh_search_vectors, task_search_vector
+from tasks.subscriptions import publish_comment_added, publish_task_changed
+
+
+# task fields that feed the search vector
+SEARCHED_FIELDS = {"title", "description"}
+
+
+def invalidate_tasks(tasks):
+    """drop cached responses built from tasks or their projects once committed"""
+    response_cache.invalidate_on_commit(
+        tag
+        for task in tasks
+        for tag in (instance_tag(Task, task.id), instance_tag(Project, task.project_id))
+    )
+
+
+def invalidate_comments(comments):
+    """drop cached responses built from the commented tasks once committed"""
+    response_cache.invalidate_on_commit(instance_tag(Task, comment.task_id) for comment in comments)
 
 
 class CreateTask(graphene.Mutation):
@@ -15,22 +50,29 @@ class CreateTask(graphene.Mutation):
         description = graphene.String()
         assignee_email = graphene.String()
 
+    @in_thread
     def mutate(self, info, project_id, title, status, description="", assignee_email=""):
         """create task for a project"""
         org = info.context.organization
+        counter_field(status)
 
         project = Project.objects.get(
             id=project_id,
             organization=org,
         )
 
-        task = Task.objects.create(
-            project=project,
-            title=title,
-            status=status,
-            description=description,
-            assignee_email=assignee_email,
-        )
+        with transaction.atomic():
+            task = Task.objects.create(
+                project=project,
+                title=title,
+                status=status,
+                description=description,
+                assignee_email=assignee_email,
+            )
+            task_created(project.id, status)
+            refresh_search_vectors(Task.objects.filter(pk=task.pk))
+            publish_task_changed(task, "CREATED")
+            invalidate_tasks([task])
         return CreateTask(task=task)
 
 
@@ -44,21 +86,43 @@ class UpdateTask(graphene.Mutation):
         description = graphene.String()
         status = graphene.String()
         assignee_email = graphene.String()
+        expected_version = graphene.Int()
 
-    def mutate(self, info, task_id, **kwargs):
-        """update task fields"""
+    @in_thread
+    def mutate(self, info, task_id, expected_version=None, **kwargs):
+        """update only the provided task fields"""
         org = info.context.organization
+        changes = {key: value for key, value in kwargs.items() if value is not None}
+        if "status" in changes:
+            counter_field(changes["status"])
 
-        task = Task.objects.get(
+        queryset = Task.objects.filter(
             id=task_id,
             project__organization=org,
         )
 
-        for key, value in kwargs.items():
-            if value is not None:
-                setattr(task, key, value)
+        # without a status change there are no counters to move, so the
+        # response can come straight from UPDATE ... RETURNING
+        returning = selected_columns(info, Task, "task")
+        if changes and "status" not in changes and returning is not None:
+            # project is returned too so the change event needs no extra query
+            searched = {name: changes[name] for name in SEARCHED_FIELDS & changes.keys()}
+            if searched:
+                changes["search_vector"] = task_search_vector(**searched)
+            task = write_changes(queryset, changes, returning | {"project"}, expected_version)
+            publish_task_changed(task, "UPDATED")
+            invalidate_tasks([task])
+            return UpdateTask(task=task)
 
-        task.save()
+        with transaction.atomic():
+            task = queryset.select_for_update(of=("self",)).get()
+            old_status = task.status
+            changed = save_changes(task, changes, expected_version)
+            task_status_changed(task.project_id, old_status, task.status)
+            if SEARCHED_FIELDS.intersection(changed):
+                refresh_search_vectors(Task.objects.filter(pk=task.pk))
+            publish_task_changed(task, "UPDATED")
+            invalidate_tasks([task])
         return UpdateTask(task=task)
 
 
@@ -71,6 +135,7 @@ class AddTaskComment(graphene.Mutation):
         content = graphene.String(required=True)
         author_email = graphene.String(required=True)
 
+    @in_thread
     def mutate(self, info, task_id, content, author_email):
         """create comment for a task"""
         org = info.context.organization
@@ -85,4 +150,199 @@ class AddTaskComment(graphene.Mutation):
             content=content,
             author_email=author_email,
         )
+        refresh_search_vectors(Task.objects.filter(pk=task.pk))
+        publish_comment_added(comment)
+        invalidate_comments([comment])
         return AddTaskComment(comment=comment)
+
+
+class BulkItemErrorType(graphene.ObjectType):
+    """error for one item of a bulk mutation"""
+    index = graphene.Int()
+    message = graphene.String()
+
+
+class BulkTaskInput(graphene.InputObjectType):
+    """task to create in bulk"""
+    project_id = graphene.ID(required=True)
+    title = graphene.String(required=True)
+    status = graphene.String(required=True)
+    description = graphene.String()
+    assignee_email = graphene.String()
+
+
+class TaskStatusInput(graphene.InputObjectType):
+    """status change for one task"""
+    task_id = graphene.ID(required=True)
+    status = graphene.String(required=True)
+
+
+class BulkCommentInput(graphene.InputObjectType):
+    """comment to add in bulk"""
+    task_id = graphene.ID(required=True)
+    content = graphene.String(required=True)
+    author_email = graphene.String(required=True)
+
+
+def parse_id(value):
+    """database id from a graphql ID, or None when malformed"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def check_bulk_size(items):
+    """reject batches larger than GRAPHQL_MAX_BULK_ITEMS"""
+    limit = getattr(settings, "GRAPHQL_MAX_BULK_ITEMS", 1000)
+    if len(items) > limit:
+        raise Exception(f"At most {limit} items per bulk mutation")
+
+
+def apply_counter_deltas(deltas):
+    """apply project -> status -> delta counter changes"""
+    for project_id, status_deltas in deltas.items():
+        apply_task_counter_deltas(project_id, status_deltas)
+
+
+class BulkCreateTasks(graphene.Mutation):
+    """mutation to create many tasks in one transaction"""
+    tasks = graphene.List(TaskType)
+    errors = graphene.List(BulkItemErrorType)
+
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(BulkTaskInput), required=True)
+
+    @in_thread
+    def mutate(self, info, tasks):
+        """create every valid task and report the rest"""
+        org = info.context.organization
+        check_bulk_size(tasks)
+
+        project_ids = {parse_id(item.project_id) for item in tasks}
+        owned = set(
+            Project.objects.filter(id__in=project_ids - {None}, organization=org)
+            .values_list("id", flat=True)
+        )
+
+        errors, pending = [], []
+        deltas = defaultdict(lambda: defaultdict(int))
+        for index, item in enumerate(tasks):
+            project_id = parse_id(item.project_id)
+            if project_id not in owned:
+                errors.append(BulkItemErrorType(index=index, message="Project not found"))
+            elif item.status not in STATUS_COUNTER_FIELDS:
+                errors.append(BulkItemErrorType(index=index, message=f"Invalid task status: {item.status}"))
+            else:
+                pending.append(
+                    Task(
+                        project_id=project_id,
+                        title=item.title,
+                        status=item.status,
+                        description=item.description or "",
+                        assignee_email=item.assignee_email or "",
+                    )
+                )
+                deltas[project_id][item.status] += 1
+
+        with transaction.atomic():
+            created = Task.objects.bulk_create(pending)
+            apply_counter_deltas(deltas)
+            refresh_search_vectors(Task.objects.filter(pk__in=[task.pk for task in created]))
+            for task in created:
+                publish_task_changed(task, "CREATED")
+            invalidate_tasks(created)
+        return BulkCreateTasks(tasks=created, errors=errors)
+
+
+class BulkUpdateTaskStatus(graphene.Mutation):
+    """mutation to move many tasks between statuses in one transaction"""
+    tasks = graphene.List(TaskType)
+    errors = graphene.List(BulkItemErrorType)
+
+    class Arguments:
+        updates = graphene.List(graphene.NonNull(TaskStatusInput), required=True)
+
+    @in_thread
+    def mutate(self, info, updates):
+        """update every valid task status and report the rest"""
+        org = info.context.organization
+        check_bulk_size(updates)
+
+        errors = []
+        deltas = defaultdict(lambda: defaultdict(int))
+        with transaction.atomic():
+            task_ids = {parse_id(item.task_id) for item in updates}
+            found = (
+                Task.objects.select_for_update(of=("self",))
+                .filter(id__in=task_ids - {None}, project__organization=org)
+                .in_bulk()
+            )
+
+            changed = {}
+            for index, item in enumerate(updates):
+                task = found.get(parse_id(item.task_id))
+                if task is None:
+                    errors.append(BulkItemErrorType(index=index, message="Task not found"))
+                elif item.status not in STATUS_COUNTER_FIELDS:
+                    errors.append(BulkItemErrorType(index=index, message=f"Invalid task status: {item.status}"))
+                elif task.status != item.status:
+                    deltas[task.project_id][task.status] -= 1
+                    deltas[task.project_id][item.status] += 1
+                    task.status = item.status
+                    task.version += 1
+                    changed[task.id] = task
+
+            Task.objects.bulk_update(changed.values(), ["status", "version"])
+            apply_counter_deltas(deltas)
+            for task in changed.values():
+                publish_task_changed(task, "UPDATED")
+            invalidate_tasks(changed.values())
+
+        tasks = list(dict.fromkeys(
+            found[task_id] for task_id in (parse_id(item.task_id) for item in updates)
+            if task_id in found
+        ))
+        return BulkUpdateTaskStatus(tasks=tasks, errors=errors)
+
+
+class BulkAddComments(graphene.Mutation):
+    """mutation to add many comments in one transaction"""
+    comments = graphene.List(TaskCommentType)
+    errors = graphene.List(BulkItemErrorType)
+
+    class Arguments:
+        comments = graphene.List(graphene.NonNull(BulkCommentInput), required=True)
+
+    @in_thread
+    def mutate(self, info, comments):
+        """create every valid comment and report the rest"""
+        org = info.context.organization
+        check_bulk_size(comments)
+
+        task_ids = {parse_id(item.task_id) for item in comments}
+        owned = set(
+            Task.objects.filter(id__in=task_ids - {None}, project__organization=org)
+            .values_list("id", flat=True)
+        )
+
+        errors, pending = [], []
+        for index, item in enumerate(comments):
+            task_id = parse_id(item.task_id)
+            if task_id not in owned:
+                errors.append(BulkItemErrorType(index=index, message="Task not found"))
+            else:
+                pending.append(
+                    TaskComment(
+                        task_id=task_id,
+                        content=item.content,
+                        author_email=item.author_email,
+                    )
+                )
+
+        created = TaskComment.objects.bulk_create(pending)
+        refresh_search_vectors(Task.objects.filter(pk__in={comment.task_id for comment in created}))
+        for comment in created:
+            publish_comment_added(comment)
+        invalidate_comments(created)
+        return BulkAddComments(comments=created, errors=errors)
@@ -1,6 +1,16 @@
 import graphene
 from graphene_django import DjangoObjectType
+from core.dataloader import load_related
+from core.execution import with_async
+from core.pagination import (
+    CountableConnection,
+    aconnection_from_queryset,
+    connection_args,
+    connection_from_queryset,
+)
+from core.responses import skip_response_cache
 from tasks.models import Task, TaskComment
+from tasks.search import search_tasks
 
 
 class TaskCommentType(DjangoObjectType):
@@ -27,9 +37,31 @@ class TaskType(DjangoObjectType):
             "assignee_email",
             "due_date",
             "created_at",
+            "version",
             "comments",
         )
 
+    def resolve_comments(self, info):
+        """resolve comments for all tasks in the request with one query"""
+        return load_related(info, self, "comments")
+
+
+class TaskConnection(CountableConnection):
+    """paginated tasks, newest first"""
+    class Meta:
+        node = TaskType
+
+
+class TaskCommentConnection(CountableConnection):
+    """paginated task comments, oldest first"""
+    class Meta:
+        node = TaskCommentType
+
+
+TASK_ORDERING = [("created_at", True), ("id", True)]
+TASK_COMMENT_ORDERING = [("created_at", False), ("id", False)]
+SEARCH_ORDERING = [("rank", True), ("id", True)]
+
 
 class Query(graphene.ObjectType):
     """task graphql queries"""
@@ -43,6 +75,26 @@ class Query(graphene.ObjectType):
         task_id=graphene.ID(required=True),
     )
 
+    tasks_connection = graphene.Field(
+        TaskConnection,
+        project_id=graphene.ID(required=True),
+        **connection_args(),
+    )
+
+    task_comments_connection = graphene.Field(
+        TaskCommentConnection,
+        task_id=graphene.ID(required=True),
+        **connection_args(),
+    )
+
+    search_tasks = graphene.Field(
+        TaskConnection,
+        query=graphene.String(required=True),
+        project_id=graphene.ID(),
+        status=graphene.String(),
+        **connection_args(),
+    )
+
     def resolve_tasks(self, info, project_id):
         """resolve tasks for a project"""
         org = info.context.organization
@@ -58,3 +110,63 @@ class Query(graphene.ObjectType):
             task_id=task_id,
             task__project__organization=org,
         ).order_by("created_at")
+
+    async def aresolve_tasks_connection(self, info, project_id, **kwargs):
+        queryset = project_tasks(info, project_id)
+        return await aconnection_from_queryset(TaskConnection, queryset, info, TASK_ORDERING, **kwargs)
+
+    @with_async(aresolve_tasks_connection)
+    def resolve_tasks_connection(self, info, project_id, **kwargs):
+        """resolve a keyset paginated page of tasks for a project"""
+        queryset = project_tasks(info, project_id)
+        return connection_from_queryset(TaskConnection, queryset, info, TASK_ORDERING, **kwargs)
+
+    async def aresolve_task_comments_connection(self, info, task_id, **kwargs):
+        queryset = task_comments(info, task_id)
+        return await aconnection_from_queryset(
+            TaskCommentConnection, queryset, info, TASK_COMMENT_ORDERING, **kwargs
+        )
+
+    @with_async(aresolve_task_comments_connection)
+    def resolve_task_comments_connection(self, info, task_id, **kwargs):
+        """resolve a keyset paginated page of comments for a task"""
+        queryset = task_comments(info, task_id)
+        return connection_from_queryset(
+            TaskCommentConnection, queryset, info, TASK_COMMENT_ORDERING, **kwargs
+        )
+
+    async def aresolve_search_tasks(self, info, query, project_id=None, status=None, **kwargs):
+        queryset = matching_tasks(info, query, project_id, status)
+        return await aconnection_from_queryset(TaskConnection, queryset, info, SEARCH_ORDERING, **kwargs)
+
+    @with_async(aresolve_search_tasks)
+    def resolve_search_tasks(self, info, query, project_id=None, status=None, **kwargs):
+        """resolve a page of tasks matching query, best match first"""
+        queryset = matching_tasks(info, query, project_id, status)
+        return connection_from_queryset(TaskConnection, queryset, info, SEARCH_ORDERING, **kwargs)
+
+
+def matching_tasks(info, query, project_id, status):
+    """search results in the current organization
+
+    they depend on every task and comment of the organization, which no
+    single response cache tag covers, so they are never cached.
+    """
+    skip_response_cache(info)
+    return search_tasks(info.context.organization, query, project_id, status)
+
+
+def project_tasks(info, project_id):
+    """tasks of a project in the current organization"""
+    return Task.objects.filter(
+        project_id=project_id,
+        project__organization=info.context.organization,
+    )
+
+
+def task_comments(info, task_id):
+    """comments of a task in the current organization"""
+    return TaskComment.objects.filter(
+        task_id=task_id,
+        task__project__organization=info.context.organization,
+    )
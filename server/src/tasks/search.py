@@ -0,0 +1,52 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from tasks.models import Task, TaskComment
+
+SEARCH_CONFIG = "english"
+
+
+def task_search_vector(comment_model=TaskComment, **values):
+    """weighted vector over a task's title, description and comments
+
+    title or description given in values are used instead of the stored
+    column, so the vector can be written by the same update as the text.
+    """
+    comments = (
+        comment_model.objects.filter(task=OuterRef("pk"))
+        .order_by()
+        .values("task")
+        .annotate(text=StringAgg("content", " "))
+        .values("text")
+    )
+    return (
+        SearchVector(searched(values, "title"), weight="A", config=SEARCH_CONFIG)
+        + SearchVector(searched(values, "description"), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(Coalesce(Subquery(comments), Value(""), output_field=TextField()), weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def searched(values, field):
+    """new value of a searched field, or its column"""
+    return Value(values[field], output_field=TextField()) if field in values else field
+
+
+def refresh_search_vectors(tasks, comment_model=TaskComment):
+    """recompute the search vector of every task in the queryset with one update"""
+    tasks.update(search_vector=task_search_vector(comment_model))
+
+
+def search_tasks(org, query, project_id=None, status=None):
+    """tasks of org matching a websearch query, annotated with their rank"""
+    if not query.strip():
+        raise Exception("Search query must not be empty")
+
+    search_query = SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+    tasks = Task.objects.filter(project__organization=org, search_vector=search_query)
+    if project_id is not None:
+        tasks = tasks.filter(project_id=project_id)
+    if status is not None:
+        tasks = tasks.filter(status=status)
+    return tasks.annotate(rank=SearchRank(F("search_vector"), search_query))
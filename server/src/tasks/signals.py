@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from projects.counters import task_deleted
+from tasks.models import Task
+
+
+@receiver(post_delete, sender=Task)
+def uncount_deleted_task(sender, instance, **kwargs):
+    """keep project task counters in sync when a task is deleted"""
+    task_deleted(instance.project_id, instance.status)
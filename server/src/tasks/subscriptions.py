@@ -0,0 +1,77 @@
+import graphene
+from core.pubsub import broker, publish_on_commit
+from projects.models import Project
+from tasks.models import Task, TaskComment
+from tasks.schema import TaskCommentType, TaskType
+
+
+class TaskChangeKind(graphene.Enum):
+    """what happened to a task"""
+    CREATED = "CREATED"
+    UPDATED = "UPDATED"
+
+
+class TaskChangedType(graphene.ObjectType):
+    """a task that was created or updated"""
+    kind = graphene.Field(TaskChangeKind)
+    task = graphene.Field(TaskType)
+
+
+def project_channel(project_id):
+    return f"project:{project_id}:tasks"
+
+
+def task_channel(task_id):
+    return f"task:{task_id}:comments"
+
+
+def publish_task_changed(task, kind):
+    """tell the task's project subscribers once the transaction commits"""
+    publish_on_commit(project_channel(task.project_id), {"kind": kind, "task_id": task.id})
+
+
+def publish_comment_added(comment):
+    """tell the comment's task subscribers once the transaction commits"""
+    publish_on_commit(task_channel(comment.task_id), {"comment_id": comment.id})
+
+
+class Subscription(graphene.ObjectType):
+    """task graphql subscriptions"""
+    task_changed = graphene.Field(
+        TaskChangedType,
+        project_id=graphene.ID(required=True),
+    )
+
+    comment_added = graphene.Field(
+        TaskCommentType,
+        task_id=graphene.ID(required=True),
+    )
+
+    async def subscribe_task_changed(self, info, project_id):
+        """stream changes to the tasks of a project"""
+        org = info.context.organization
+        if not await Project.objects.filter(id=project_id, organization=org).aexists():
+            raise Exception("Project not found")
+        return broker.subscribe(project_channel(project_id))
+
+    async def resolve_task_changed(self, info, project_id):
+        """load the changed task, scoped to the organization"""
+        task = await Task.objects.filter(
+            id=self["task_id"],
+            project__organization=info.context.organization,
+        ).afirst()
+        return TaskChangedType(kind=self["kind"], task=task)
+
+    async def subscribe_comment_added(self, info, task_id):
+        """stream comments added to a task"""
+        org = info.context.organization
+        if not await Task.objects.filter(id=task_id, project__organization=org).aexists():
+            raise Exception("Task not found")
+        return broker.subscribe(task_channel(task_id))
+
+    async def resolve_comment_added(self, info, task_id):
+        """load the new comment, scoped to the organization"""
+        return await TaskComment.objects.filter(
+            id=self["comment_id"],
+            task__project__organization=info.context.organization,
+        ).afirst()
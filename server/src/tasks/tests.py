@@ -92,3 +92,606 @@ class TaskCommentModelTest(TestCase):
         self.assertEqual(comments[0].content, "Test comment")
         self.assertEqual(comments[1].content, "Newer comment")
 
+
+
+class TaskCounterMutationTest(TestCase):
+    """test task mutations maintain project counters"""
+
+    def setUp(self):
+        """set up test data"""
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+        self.project = Project.objects.create(
+            organization=self.org,
+            name="Test Project",
+            status="ACTIVE",
+        )
+
+    def execute(self, query):
+        """run query for the test organization"""
+        response = self.client.post(
+            "/graphql/",
+            {"query": query},
+            content_type="application/json",
+            headers={"X-ORG-SLUG": "test-org"},
+        )
+        return response.json()
+
+    def create_task(self, status):
+        """create a task through the mutation"""
+        result = self.execute(
+            'mutation { createTask(projectId: %d, title: "Task", status: "%s") { task { id } } }'
+            % (self.project.id, status)
+        )
+        return result["data"]["createTask"]["task"]["id"]
+
+    def test_counters_follow_create_update_and_delete(self):
+        """test counters track task lifecycle"""
+        task_id = self.create_task("TODO")
+        self.create_task("TODO")
+
+        self.execute('mutation { updateTask(taskId: %s, status: "DONE") { task { id } } }' % task_id)
+        self.project.refresh_from_db()
+        self.assertEqual(
+            (self.project.task_count, self.project.todo_task_count, self.project.done_task_count),
+            (2, 1, 1),
+        )
+
+        Task.objects.get(pk=task_id).delete()
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.task_count, self.project.done_task_count), (1, 0))
+
+    def test_invalid_status_is_rejected(self):
+        """test unknown statuses cannot corrupt counters"""
+        result = self.execute(
+            'mutation { createTask(projectId: %d, title: "Task", status: "LATER") { task { id } } }'
+            % self.project.id
+        )
+        self.assertIn("Invalid task status", result["errors"][0]["message"])
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskConnectionQueryTest(TestCase):
+    """test keyset paginated task and comment connections"""
+
+    QUERY = """
+        query page($projectId: ID!, $first: Int, $after: String, $last: Int, $before: String) {
+            tasksConnection(projectId: $projectId, first: $first, after: $after,
+                            last: $last, before: $before) {
+                totalCount
+                pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+                edges { cursor node { title } }
+            }
+        }
+    """
+
+    def setUp(self):
+        """set up test data"""
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+        self.project = Project.objects.create(
+            organization=self.org,
+            name="Test Project",
+            status="ACTIVE",
+        )
+        self.task = None
+        for i in range(5):
+            self.task = Task.objects.create(project=self.project, title=f"Task {i}", status="TODO")
+            TaskComment.objects.create(task=self.task, content=f"Comment {i}", author_email="a@example.com")
+
+    def execute(self, query, **variables):
+        """run query for the test organization"""
+        response = self.client.post(
+            "/graphql/",
+            {"query": query, "variables": variables},
+            content_type="application/json",
+            headers={"X-ORG-SLUG": "test-org"},
+        )
+        result = response.json()
+        self.assertNotIn("errors", result)
+        return result["data"]
+
+    def test_forward_pagination(self):
+        """test first/after walks every task newest first exactly once"""
+        titles, after = [], None
+        while True:
+            page = self.execute(self.QUERY, projectId=self.project.id, first=2, after=after)
+            connection = page["tasksConnection"]
+            titles += [edge["node"]["title"] for edge in connection["edges"]]
+            if not connection["pageInfo"]["hasNextPage"]:
+                break
+            after = connection["pageInfo"]["endCursor"]
+
+        self.assertEqual(titles, [f"Task {i}" for i in reversed(range(5))])
+        self.assertEqual(connection["totalCount"], 5)
+
+    def test_backward_pagination(self):
+        """test last/before returns the page preceding the cursor"""
+        first = self.execute(self.QUERY, projectId=self.project.id, first=3)["tasksConnection"]
+        before = first["pageInfo"]["endCursor"]
+
+        page = self.execute(self.QUERY, projectId=self.project.id, last=2, before=before)
+        connection = page["tasksConnection"]
+        self.assertEqual(
+            [edge["node"]["title"] for edge in connection["edges"]],
+            ["Task 4", "Task 3"],
+        )
+        self.assertFalse(connection["pageInfo"]["hasPreviousPage"])
+        self.assertTrue(connection["pageInfo"]["hasNextPage"])
+
+    def test_total_count_only_when_selected(self):
+        """test no count query runs unless totalCount is requested"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.execute(
+                "query($id: ID!) { tasksConnection(projectId: $id, first: 2) { edges { node { id } } } }",
+                id=self.project.id,
+            )
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+
+    def test_comment_connection_is_oldest_first(self):
+        """test comments paginate in ascending creation order"""
+        TaskComment.objects.create(task=self.task, content="Later", author_email="a@example.com")
+        page = self.execute(
+            "query($id: ID!) { taskCommentsConnection(taskId: $id, first: 5) { edges { node { content } } } }",
+            id=self.task.id,
+        )
+        self.assertEqual(
+            [edge["node"]["content"] for edge in page["taskCommentsConnection"]["edges"]],
+            ["Comment 4", "Later"],
+        )
+
+
+class TaskSearchQueryTest(TestCase):
+    """test full-text task search"""
+
+    QUERY = """
+        query search($query: String!, $projectId: ID, $status: String, $first: Int, $after: String) {
+            searchTasks(query: $query, projectId: $projectId, status: $status, first: $first, after: $after) {
+                pageInfo { hasNextPage endCursor }
+                edges { node { title } }
+            }
+        }
+    """
+
+    def setUp(self):
+        """set up test data"""
+        from tasks.search import refresh_search_vectors
+
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+        self.project = Project.objects.create(organization=self.org, name="Test Project", status="ACTIVE")
+        self.other_project = Project.objects.create(organization=self.org, name="Other", status="ACTIVE")
+        self.tasks = {
+            "in title": Task.objects.create(project=self.project, title="Fix invoices", status="TODO"),
+            "in description": Task.objects.create(
+                project=self.project, title="Billing", description="the invoice total is wrong", status="DONE",
+            ),
+            "in comment": Task.objects.create(project=self.other_project, title="Follow up", status="TODO"),
+            "unrelated": Task.objects.create(project=self.project, title="Write docs", status="TODO"),
+        }
+        TaskComment.objects.create(
+            task=self.tasks["in comment"], content="customer sent an invoice", author_email="a@example.com",
+        )
+        refresh_search_vectors(Task.objects.all())
+
+    def execute(self, document, slug="test-org", **variables):
+        """run document for an organization"""
+        response = self.client.post(
+            "/graphql/",
+            {"query": document, "variables": variables},
+            content_type="application/json",
+            headers={"X-ORG-SLUG": slug},
+        )
+        return response.json()
+
+    def search(self, **variables):
+        """titles of every match, following cursors one row at a time"""
+        titles, after = [], None
+        while True:
+            result = self.execute(self.QUERY, first=1, after=after, **variables)
+            self.assertNotIn("errors", result)
+            connection = result["data"]["searchTasks"]
+            titles += [edge["node"]["title"] for edge in connection["edges"]]
+            if not connection["pageInfo"]["hasNextPage"]:
+                return titles
+            after = connection["pageInfo"]["endCursor"]
+
+    def test_matches_are_ranked_and_paginated(self):
+        """test title matches rank above description and comment matches"""
+        self.assertEqual(self.search(query="invoice"), ["Fix invoices", "Billing", "Follow up"])
+
+    def test_filters(self):
+        """test project and status narrow the matches"""
+        self.assertEqual(self.search(query="invoice", projectId=self.other_project.id), ["Follow up"])
+        self.assertEqual(self.search(query="invoice", status="DONE"), ["Billing"])
+
+    def test_mutations_keep_vectors_current(self):
+        """test updated titles and new comments become searchable"""
+        task = self.tasks["unrelated"]
+        self.execute(
+            "mutation($id: ID!) { updateTask(taskId: $id, title: \"Write changelog\") { task { id } } }",
+            id=task.id,
+        )
+        self.assertEqual(self.search(query="changelog"), ["Write changelog"])
+
+        self.execute(
+            "mutation($id: ID!) { addTaskComment(taskId: $id, content: \"needs screenshots\","
+            " authorEmail: \"a@example.com\") { comment { id } } }",
+            id=task.id,
+        )
+        self.assertEqual(self.search(query="screenshot"), ["Write changelog"])
+
+    def test_other_organization_sees_nothing(self):
+        """test search is scoped to the requesting organization"""
+        Organization.objects.create(name="Other", slug="other-org", contact_email="o@example.com")
+        result = self.execute(self.QUERY, slug="other-org", query="invoice")
+        self.assertEqual(result["data"]["searchTasks"]["edges"], [])
+
+
+class BulkTaskMutationTest(TestCase):
+    """test bulk task and comment mutations"""
+
+    def setUp(self):
+        """set up test data"""
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+        self.project = Project.objects.create(
+            organization=self.org,
+            name="Test Project",
+            status="ACTIVE",
+        )
+        other_org = Organization.objects.create(
+            name="Other Organization",
+            slug="other-org",
+            contact_email="other@example.com",
+        )
+        self.other_project = Project.objects.create(
+            organization=other_org,
+            name="Other Project",
+            status="ACTIVE",
+        )
+
+    def execute(self, query, **variables):
+        """run query for the test organization"""
+        response = self.client.post(
+            "/graphql/",
+            {"query": query, "variables": variables},
+            content_type="application/json",
+            headers={"X-ORG-SLUG": "test-org"},
+        )
+        result = response.json()
+        self.assertNotIn("errors", result)
+        return result["data"]
+
+    def create_tasks(self, count):
+        """create tasks through bulkCreateTasks"""
+        data = self.execute(
+            "mutation($tasks: [BulkTaskInput!]!) { bulkCreateTasks(tasks: $tasks) {"
+            " tasks { id } errors { index message } } }",
+            tasks=[
+                {"projectId": self.project.id, "title": f"Task {i}", "status": "TODO"}
+                for i in range(count)
+            ],
+        )
+        return [task["id"] for task in data["bulkCreateTasks"]["tasks"]]
+
+    def move(self, task_ids, status):
+        """move tasks through bulkUpdateTaskStatus"""
+        return self.execute(
+            "mutation($updates: [TaskStatusInput!]!) { bulkUpdateTaskStatus(updates: $updates) {"
+            " tasks { id status } errors { index message } } }",
+            updates=[{"taskId": task_id, "status": status} for task_id in task_ids],
+        )["bulkUpdateTaskStatus"]
+
+    def test_bulk_create_reports_item_errors(self):
+        """test invalid items are reported without aborting the batch"""
+        data = self.execute(
+            "mutation($tasks: [BulkTaskInput!]!) { bulkCreateTasks(tasks: $tasks) {"
+            " tasks { title } errors { index message } } }",
+            tasks=[
+                {"projectId": self.project.id, "title": "Valid", "status": "TODO"},
+                {"projectId": self.other_project.id, "title": "Foreign", "status": "TODO"},
+                {"projectId": self.project.id, "title": "Bad", "status": "LATER"},
+            ],
+        )["bulkCreateTasks"]
+
+        self.assertEqual(data["tasks"], [{"title": "Valid"}])
+        self.assertEqual([error["index"] for error in data["errors"]], [1, 2])
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.task_count, self.project.todo_task_count), (1, 1))
+
+    def test_bulk_status_update_query_count_is_constant(self):
+        """test moving many tasks costs the same queries as moving a few"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        few, many = self.create_tasks(2), self.create_tasks(30)
+        with CaptureQueriesContext(connection) as small:
+            self.move(few, "DONE")
+        with CaptureQueriesContext(connection) as large:
+            result = self.move(many + ["0"], "DONE")
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(result["errors"], [{"index": 30, "message": "Task not found"}])
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_task_count, self.project.done_task_count), (0, 32))
+
+    def test_bulk_add_comments(self):
+        """test comments are only added to tasks of the organization"""
+        task_id = self.create_tasks(1)[0]
+        foreign = Task.objects.create(project=self.other_project, title="Foreign", status="TODO")
+
+        data = self.execute(
+            "mutation($comments: [BulkCommentInput!]!) { bulkAddComments(comments: $comments) {"
+            " comments { content } errors { index } } }",
+            comments=[
+                {"taskId": task_id, "content": "Hello", "authorEmail": "a@example.com"},
+                {"taskId": foreign.id, "content": "Nope", "authorEmail": "a@example.com"},
+            ],
+        )["bulkAddComments"]
+
+        self.assertEqual(data["comments"], [{"content": "Hello"}])
+        self.assertEqual(data["errors"], [{"index": 1}])
+
+
+class UpdateTaskMutationTest(TestCase):
+    """test partial task updates"""
+
+    MUTATION = """
+        mutation($taskId: ID!, $title: String, $status: String, $expectedVersion: Int) {
+            updateTask(taskId: $taskId, title: $title, status: $status,
+                       expectedVersion: $expectedVersion) {
+                task { id title status version }
+            }
+        }
+    """
+
+    def setUp(self):
+        """set up test data"""
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+        self.project = Project.objects.create(
+            organization=self.org,
+            name="Test Project",
+            status="ACTIVE",
+        )
+        self.task = Task.objects.create(
+            project=self.project,
+            title="Test Task",
+            description="Long description",
+            status="TODO",
+        )
+
+    def execute(self, **variables):
+        """run the update mutation for the test organization"""
+        response = self.client.post(
+            "/graphql/",
+            {"query": self.MUTATION, "variables": {"taskId": self.task.id, **variables}},
+            content_type="application/json",
+            headers={"X-ORG-SLUG": "test-org"},
+        )
+        return response.json()
+
+    def test_title_update_is_a_single_statement(self):
+        """test a column-only update needs no read and leaves other columns alone"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.execute(title="Warm")  # warm the organization cache
+        with CaptureQueriesContext(connection) as ctx:
+            result = self.execute(title="Renamed")
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        sql = ctx.captured_queries[0]["sql"]
+        self.assertTrue(sql.startswith("UPDATE") and "RETURNING" in sql)
+        # description is read for the search vector but never written
+        self.assertNotIn('"description" =', sql)
+        self.assertEqual(
+            result["data"]["updateTask"]["task"],
+            {"id": str(self.task.id), "title": "Renamed", "status": "TODO", "version": 2},
+        )
+
+    def test_status_update_saves_changed_fields_only(self):
+        """test the locked path writes only the status and version"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            result = self.execute(status="DONE", title="Test Task")
+
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"title"', updates[0])
+        self.assertEqual(result["data"]["updateTask"]["task"]["version"], 1)
+
+    def test_version_conflict(self):
+        """test a stale expected version is rejected on both paths"""
+        self.execute(title="First", expectedVersion=0)
+
+        for variables in ({"title": "Stale"}, {"status": "DONE"}):
+            result = self.execute(expectedVersion=0, **variables)
+            self.assertIn("Version conflict", result["errors"][0]["message"])
+
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.status), ("First", "TODO"))
+
+    def test_other_organization_cannot_update(self):
+        """test tenant scoping of the single statement update"""
+        Organization.objects.create(name="Other", slug="other-org", contact_email="o@example.com")
+        response = self.client.post(
+            "/graphql/",
+            {"query": self.MUTATION, "variables": {"taskId": self.task.id, "title": "Hijack"}},
+            content_type="application/json",
+            headers={"X-ORG-SLUG": "other-org"},
+        )
+        self.assertIn("does not exist", response.json()["errors"][0]["message"])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, "Test Task")
+
+
+class TaskSubscriptionTest(TestCase):
+    """test task and comment subscriptions over the websocket endpoint"""
+
+    def setUp(self):
+        """set up test data"""
+        from orgs.cache import organization_cache
+
+        organization_cache.clear()
+        self.org = Organization.objects.create(
+            name="Test Organization",
+            slug="test-org",
+            contact_email="test@example.com",
+        )
+        self.project = Project.objects.create(
+            organization=self.org,
+            name="Test Project",
+            status="ACTIVE",
+        )
+        self.task = Task.objects.create(project=self.project, title="Test Task", status="TODO")
+
+    async def connect(self, slug="test-org"):
+        """open an acknowledged graphql-transport-ws connection"""
+        from asgiref.testing import ApplicationCommunicator
+        from config.asgi import application
+
+        socket = ApplicationCommunicator(application, {
+            "type": "websocket",
+            "path": "/graphql/",
+            "headers": [],
+            "subprotocols": ["graphql-transport-ws"],
+        })
+        await socket.send_input({"type": "websocket.connect"})
+        self.assertEqual((await socket.receive_output(1))["type"], "websocket.accept")
+        await self.send(socket, {"type": "connection_init", "payload": {"X-ORG-SLUG": slug}})
+        return socket
+
+    async def send(self, socket, message):
+        """send a protocol message"""
+        import json
+
+        await socket.send_input({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def receive(self, socket):
+        """next protocol message sent to the client"""
+        import json
+
+        return json.loads((await socket.receive_output(1))["text"])
+
+    async def subscribe(self, socket, query, **variables):
+        """start a subscription and wait until it is registered"""
+        await self.send(socket, {"id": "1", "type": "subscribe", "payload": {"query": query, "variables": variables}})
+        # messages are handled in order, so the pong means the subscription is live
+        await self.send(socket, {"type": "ping"})
+        self.assertEqual(await self.receive(socket), {"type": "pong"})
+
+    async def mutate(self, query, **variables):
+        """run a mutation from another thread, as a wsgi worker would"""
+        from asgiref.sync import sync_to_async
+
+        await sync_to_async(self.mutate_and_commit)(query, variables)
+
+    def mutate_and_commit(self, query, variables):
+        """run a mutation over http, firing its on-commit hooks"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/graphql/",
+                {"query": query, "variables": variables},
+                content_type="application/json",
+                headers={"X-ORG-SLUG": "test-org"},
+            )
+        self.assertNotIn("errors", response.json())
+
+    async def test_task_changes_are_pushed(self):
+        """test create and update reach project subscribers after commit"""
+        socket = await self.connect()
+        self.assertEqual(await self.receive(socket), {"type": "connection_ack"})
+        await self.subscribe(
+            socket,
+            "subscription($id: ID!) { taskChanged(projectId: $id) { kind task { title status } } }",
+            id=self.project.id,
+        )
+
+        await self.mutate(
+            'mutation($id: ID!) { createTask(projectId: $id, title: "New", status: "TODO") { task { id } } }',
+            id=self.project.id,
+        )
+        created = await self.receive(socket)
+        self.assertEqual(created["payload"]["data"]["taskChanged"], {
+            "kind": "CREATED", "task": {"title": "New", "status": "TODO"},
+        })
+
+        await self.mutate(
+            'mutation($id: ID!) { updateTask(taskId: $id, status: "DONE") { task { id } } }',
+            id=self.task.id,
+        )
+        updated = await self.receive(socket)
+        self.assertEqual(updated["payload"]["data"]["taskChanged"], {
+            "kind": "UPDATED", "task": {"title": "Test Task", "status": "DONE"},
+        })
+
+        await self.send(socket, {"id": "1", "type": "complete"})
+        await socket.send_input({"type": "websocket.disconnect", "code": 1000})
+        await socket.wait(1)
+
+    async def test_comments_are_pushed(self):
+        """test added comments reach task subscribers"""
+        socket = await self.connect()
+        await self.receive(socket)
+        await self.subscribe(
+            socket,
+            "subscription($id: ID!) { commentAdded(taskId: $id) { content authorEmail } }",
+            id=self.task.id,
+        )
+
+        await self.mutate(
+            'mutation($id: ID!) { addTaskComment(taskId: $id, content: "Hi", authorEmail: "a@example.com") { comment { id } } }',
+            id=self.task.id,
+        )
+        message = await self.receive(socket)
+        self.assertEqual(message["payload"]["data"]["commentAdded"], {
+            "content": "Hi", "authorEmail": "a@example.com",
+        })
+
+        await socket.send_input({"type": "websocket.disconnect", "code": 1000})
+        await socket.wait(1)
+
+    async def test_other_organization_cannot_subscribe(self):
+        """test subscriptions are scoped to the connection's organization"""
+        await Organization.objects.acreate(name="Other", slug="other-org", contact_email="o@example.com")
+        socket = await self.connect("other-org")
+        await self.receive(socket)
+        await self.send(socket, {
+            "id": "1",
+            "type": "subscribe",
+            "payload": {"query": f"subscription {{ taskChanged(projectId: {self.project.id}) {{ kind }} }}"},
+        })
+        message = await self.receive(socket)
+        self.assertEqual(message["type"], "error")
+        self.assertEqual(message["payload"][0]["message"], "Project not found")
+
+        await socket.send_input({"type": "websocket.disconnect", "code": 1000})
+        await socket.wait(1)
+
+    async def test_unknown_organization_is_refused(self):
+        """test the connection closes when the tenant does not exist"""
+        socket = await self.connect("missing-org")
+        closed = await socket.receive_output(1)
+        self.assertEqual((closed["type"], closed["code"]), ("websocket.close", 4403))